@@ -0,0 +1,71 @@
+"""
+Measures the cold-start import time of utils, paid by every worker process that imports it.
+
+Each measurement runs in a fresh interpreter: the time of 'import utils' minus the time of an
+empty interpreter start. Also checks that the heavy dependencies are not loaded by the import
+(they are imported by the modules of the package on first use) and reports the time of the
+first use, which loads pandas.
+
+Usage:
+    python benchmarks/bench_import.py --repeat 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Cold import of utils above which spawning many short-lived workers is no longer cheap
+IMPORT_BUDGET = 0.05
+
+# Modules that 'import utils' must not load
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'openpyxl', 'python_calamine', 'polars', 'duckdb']
+
+TIMED = """
+import sys, time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def cold_run(code):
+    """
+    Runs code in a fresh interpreter. Returns the seconds it took and the heavy modules it loaded.
+    """
+    script = TIMED.format(code=code, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    seconds, loaded = output.splitlines()[-2:]
+    return float(seconds), [m for m in loaded.split(',') if m]
+
+def median_run(code, repeat):
+    runs = [cold_run(code) for _ in range(repeat)]
+    return np.median([seconds for seconds, _ in runs]), runs[-1][1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of utils.")
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline, _ = median_run('pass', args.repeat)
+    imported, loaded = median_run('import utils', args.repeat)
+    first_use, _ = median_run('import utils; utils.load_files', args.repeat)
+
+    import_time = imported - baseline
+    print(f"📊 Cold start (median of {args.repeat})")
+    print(f"    import utils:                {import_time * 1000:.1f} ms")
+    print(f"    first use (utils.load_files): {(first_use - baseline) * 1000:.1f} ms")
+    if loaded:
+        print(f"⚠️  'import utils' loads {loaded}.")
+    if import_time > IMPORT_BUDGET:
+        print(f"⚠️  Import time above the {IMPORT_BUDGET * 1000:.0f} ms budget.")
+    else:
+        print(f"✅ Import time within the {IMPORT_BUDGET * 1000:.0f} ms budget.")
+
+
+if __name__ == '__main__':
+    main()
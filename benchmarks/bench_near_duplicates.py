@@ -0,0 +1,80 @@
+"""
+Measures find_near_duplicates() on a synthetic merged dataset with planted near-duplicates.
+
+Builds permits spread over many AHJs, copies a share of them with a re-typed permit_ID and a
+different address spelling (as a re-export would), then times the detection and reports how
+many of the planted copies were found and how many other pairs were flagged.
+
+Usage:
+    python benchmarks/bench_near_duplicates.py --rows 1000000 --duplicates 0.02
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import utils  # noqa: E402
+
+streets = ['Oak', 'Pine', 'Cedar', 'Elm', 'Birch', 'Aspen', 'Willow', 'Maple', 'Juniper', 'Spruce', 'Sage', 'Mesa']
+suffixes = [('Street', 'St'), ('Avenue', 'Ave'), ('Road', 'Rd'), ('Drive', 'Dr'), ('Lane', 'Ln'), ('Court', 'Ct')]
+
+
+def make_dataset(rows, duplicates, seed=0):
+    """
+    Synthetic cleaned rows. Returns the DataFrame and the (original, copy) position pairs planted.
+    """
+    rng = np.random.default_rng(seed)
+    originals = int(rows / (1 + duplicates))
+    street = rng.integers(0, len(streets), originals)
+    suffix = rng.integers(0, len(suffixes), originals)
+    number = rng.integers(1, 20000, originals)
+    days = pd.to_timedelta(rng.integers(0, 730, originals), unit='D')
+    base = pd.DataFrame({
+        'AHJ': [f'AHJ_{a:04d}' for a in rng.integers(0, 2000, originals)],
+        'permit_ID': [f'BLD-{i:08d}' for i in range(originals)],
+        'solarAPP_ID': '',
+        'number': number,
+        'street': street,
+        'suffix': suffix,
+        'permit_submission_date': (pd.Timestamp('2023-01-01') + days).strftime('%Y-%m-%d'),
+        'permit_status': rng.choice(['issued', 'finaled', 'other'], originals),
+    })
+    base['address'] = [f'{n} {streets[s]} {suffixes[x][1]}' for n, s, x in zip(number, street, suffix)]
+
+    copies = rng.choice(originals, rows - originals, replace=False)
+    dup = base.iloc[copies].copy()
+    dup['permit_ID'] = dup['permit_ID'].str.replace('-', '', regex=False) + ' '
+    dup['address'] = [f'{n} {streets[s]} {suffixes[x][0]}' for n, s, x in zip(dup['number'], dup['street'], dup['suffix'])]
+    dup['permit_status'] = ''
+
+    df = pd.concat([base, dup], ignore_index=True).drop(columns=['number', 'street', 'suffix'])
+    planted = set(zip(copies, range(originals, rows)))
+    return df, planted
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--duplicates', type=float, default=0.02, help="Share of rows that are planted copies.")
+    args = parser.parse_args()
+
+    df, planted = make_dataset(args.rows, args.duplicates)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        pairs = utils.find_near_duplicates(df)
+    elapsed = time.perf_counter() - start
+
+    found = set(zip(pairs['pos_a'], pairs['pos_b']))
+    print(log.getvalue().strip())
+    print(f"📊 {len(df)} rows in {elapsed:.1f}s")
+    print(f"    Planted copies found: {len(found & planted)}/{len(planted)}")
+    print(f"    Other pairs flagged:  {len(found - planted)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures clean_parallel() against clean_dataframe() on a synthetic AHJ export.
+
+Builds permits with several inspection rows each (so the inspections are merged), cleans them once
+in memory with clean_dataframe() and then with clean_parallel() for each number of workers, checks
+that every output is the same and reports the speedup over clean_dataframe() and over one worker.
+The speedup can only be near-linear up to the number of CPUs of the machine, which is printed.
+
+Usage:
+    python benchmarks/bench_parallel.py --permits 200000 --workers 1 2 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import utils  # noqa: E402
+
+descriptions = ['Roof mount PV', 'PV + battery storage', 'Solar PV system', 'Ground mount solar', 'PV w/ ESS']
+statuses = ['Issued', 'Finaled', 'Expired', 'In Review', 'Void']
+results = ['Approved', 'Failed', 'Partial Pass', 'Cancelled', 'Re-Inspection Required', '']
+
+
+def make_dataset(permits, max_inspections=4, seed=0):
+    """
+    Synthetic loaded and renamed export, one row per inspection (as the long format exports).
+    """
+    rng = np.random.default_rng(seed)
+    inspections = rng.integers(1, max_inspections + 1, permits)
+    permit = np.repeat(np.arange(permits), inspections)
+    rows = len(permit)
+    submitted = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, permits), unit='D')
+    inspected = submitted[permit] + pd.to_timedelta(rng.integers(20, 120, rows), unit='D')
+    return pd.DataFrame({
+        'permit_ID': [f'BLD-{i:08d}' for i in permit],
+        'solarAPP_ID': np.where(permit % 3 == 0, [f'SA-{i:08d}' for i in permit], ''),
+        'address': [f'{i % 9000 + 1} Mesa Dr' for i in permit],
+        'DESCRIPTION': np.array(descriptions)[permit % len(descriptions)],
+        'permit_status': np.array(statuses)[permit % len(statuses)],
+        'permit_submission_date': submitted[permit].strftime('%Y-%m-%d'),
+        'permit_issuance_date': (submitted[permit] + pd.Timedelta(days=10)).strftime('%m/%d/%Y'),
+        'inspt_status_1': rng.choice(results, rows),
+        'inspt_date_1': inspected.strftime('%Y-%m-%d'),
+        'inspt_notes_1': np.where(rng.random(rows) < 0.2, 'See comments', ''),
+    })
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel cleaning benchmark.")
+    parser.add_argument('--permits', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    df = make_dataset(args.permits)
+    print(f"📊 {len(df)} rows ({args.permits} permits), {os.cpu_count()} CPUs.")
+    if max(args.workers) > (os.cpu_count() or 1):
+        print(f"⚠️  More workers than CPUs: no speedup is expected beyond {os.cpu_count()} worker(s).")
+
+    # assign_AHJ() names the AHJ after the current folder, the same for every run
+    with tempfile.TemporaryDirectory() as folder:
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            reference, baseline = timed(utils.clean_dataframe, df.copy())
+            print(f"    clean_dataframe:    {baseline:6.1f}s")
+            single = None
+            for workers in args.workers:
+                output, seconds = timed(utils.clean_parallel, df.copy(), max_workers=workers)
+                single = single or seconds
+                same = '✅' if output.equals(reference) else '❌ different output'
+                print(f"    {workers} worker(s):        {seconds:6.1f}s  x{baseline / seconds:.2f} vs clean_dataframe, "
+                      f"x{single / seconds:.2f} vs {args.workers[0]} worker(s)  {same}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
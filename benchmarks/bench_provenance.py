@@ -0,0 +1,90 @@
+"""
+Measures the overhead of provenance tracking (load_files(provenance=True)) on the cleaning steps.
+
+Builds a synthetic AHJ export (one inspection per row, several rows per permit), then times
+load_files() + clean_dataframe() with and without provenance.
+
+Usage:
+    python benchmarks/bench_provenance.py --rows 200000 --files 4 --repeat 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import utils  # noqa: E402
+
+# Overhead above which provenance is no longer cheap enough to leave on
+MAX_OVERHEAD = 0.10
+
+column_mapping = {
+    'Permit': 'permit_ID', 'SolarAPP': 'solarAPP_ID', 'Address': 'address', 'Description': 'DESCRIPTION',
+    'Status': 'permit_status', 'Applied': 'permit_submission_date', 'Issued': 'permit_issuance_date',
+    'Result': 'inspt_status_1', 'Inspected': 'inspt_date_1', 'Notes': 'inspt_notes_1'
+}
+
+
+def make_export(rows, seed):
+    """
+    Synthetic raw export with the column names of column_mapping.
+    """
+    rng = np.random.default_rng(seed)
+    permits = rng.integers(0, max(rows // 3, 1), rows)
+    days = pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    return pd.DataFrame({
+        'Permit': [f'BLD-{p:07d}' for p in permits],
+        'SolarAPP': np.where(permits % 4 == 0, [f'SA-{p}' for p in permits], ''),
+        'Address': [f'{p % 9999} Main St' for p in permits],
+        'Description': rng.choice(['PV roof mount', 'PV + battery storage', 'Solar PV', ''], rows),
+        'Status': rng.choice(['Issued', 'Finaled', 'Expired', 'In Review', 'Void'], rows),
+        'Applied': (pd.Timestamp('2023-01-01') + days).strftime('%Y-%m-%d'),
+        'Issued': (pd.Timestamp('2023-01-15') + days).strftime('%Y-%m-%d'),
+        'Result': rng.choice(['Approved', 'FAIL', 'Cancelled', 'Partial Pass', 'Pending'], rows),
+        'Inspected': (pd.Timestamp('2023-02-01') + days).strftime('%Y-%m-%d'),
+        'Notes': rng.choice(['', 'ok', 'no access', 'missing labels'], rows)
+    })
+
+def run(exports, provenance):
+    loader = lambda name: exports[name].copy()  # noqa: E731
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = utils.load_files(list(exports), loader=loader, provenance=provenance)
+        df = df.rename(columns=column_mapping)
+        df = utils.clean_dataframe(df)
+    return time.perf_counter() - start, df
+
+def main():
+    parser = argparse.ArgumentParser(description="Provenance tracking overhead benchmark.")
+    parser.add_argument('--rows', type=int, default=200_000, help="Total raw rows.")
+    parser.add_argument('--files', type=int, default=4, help="Number of raw files the rows are split into.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    exports = {f'raw/export_{i}.csv': make_export(args.rows // args.files, seed=i) for i in range(args.files)}
+
+    timings = {False: [], True: []}
+    for _ in range(args.repeat):
+        for provenance in (False, True):
+            elapsed, df = run(exports, provenance)
+            timings[provenance].append(elapsed)
+
+    base = np.median(timings[False])
+    tracked = np.median(timings[True])
+    overhead = tracked / base - 1
+    print(f"📊 {args.rows} raw rows in {args.files} files -> {len(df)} cleaned rows (median of {args.repeat})")
+    print(f"    Without provenance: {base:.2f}s")
+    print(f"    With provenance:    {tracked:.2f}s ({overhead:+.1%})")
+    if overhead > MAX_OVERHEAD:
+        print(f"⚠️  Overhead above the {MAX_OVERHEAD:.0%} budget.")
+    else:
+        print(f"✅ Overhead within the {MAX_OVERHEAD:.0%} budget.")
+
+
+if __name__ == '__main__':
+    main()
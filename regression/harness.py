@@ -0,0 +1,296 @@
+"""
+Golden-output regression harness for the cleaning pipeline.
+
+Runs the current utils pipeline (load_files + rename + clean_dataframe, as in the notebook) and
+every alternative engine over the fixture AHJ exports in regression/fixtures, and diffs the outputs
+cell by cell:
+- every engine against the utils pipeline,
+- the utils pipeline against the saved golden output of each fixture (golden.csv).
+Dates are compared as dates (within a tolerance in days) and, optionally, the row order is ignored.
+The runtime of each engine is recorded, so a speedup ships with proof that it keeps the output.
+
+Fixtures are folders named after the AHJ, each with a raw/ folder and a column_mapping.json.
+
+Usage:
+    python regression/harness.py                     # compare everything
+    python regression/harness.py --engines parallel  # only some engines
+    python regression/harness.py --update-golden     # accept the current utils output as golden
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+import utils  # noqa: E402
+
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+GOLDEN_FILE = 'golden.csv'
+
+
+def run_utils(files, column_mapping):
+    df = utils.load_files(files)
+    df = df.rename(columns=column_mapping)
+    return utils.clean_dataframe(df)
+
+def run_parallel(files, column_mapping):
+    df = utils.load_files(files)
+    df = df.rename(columns=column_mapping)
+    return utils.clean_parallel(df, max_workers=2)
+
+def run_out_of_core(files, column_mapping):
+    with tempfile.TemporaryDirectory() as spill_dir:
+        return utils.clean_out_of_core(files, column_mapping, spill_dir=spill_dir, memory_budget_mb=1, max_workers=2)
+
+def run_selective_read(files, column_mapping):
+    df = utils.load_files(files, column_mapping=column_mapping)
+    df = df.rename(columns=column_mapping)
+    return utils.clean_dataframe(df)
+
+def run_provenance(files, column_mapping):
+    df = utils.load_files(files, provenance=True)
+    mismatched = trace_provenance(df)
+    if mismatched:
+        raise AssertionError(f"{mismatched} loaded rows don't match the raw row their provenance points to")
+    df = df.rename(columns=column_mapping)
+    df = utils.clean_dataframe(df)
+    return df[utils.data_columns(df)]
+
+# Alternative engines, compared against the utils pipeline. Each one takes the raw file paths and
+# the column mapping, runs in the fixture folder (its name is the AHJ) and returns the cleaned DataFrame.
+ENGINES = {
+    'parallel': run_parallel,
+    'out_of_core': run_out_of_core,
+    'selective_read': run_selective_read,
+    'provenance': run_provenance,
+}
+
+
+def trace_provenance(loaded, column_mapping=None):
+    """
+    Reads the raw row each loaded row points to ('source_file' and 'source_row', see add_provenance())
+    and returns the number of loaded rows whose values differ from it.
+    """
+    mismatched = 0
+    for source_id, rows in loaded.groupby('source_file'):
+        source = loaded.attrs['source_files'][source_id]
+        file, sheet = source, None
+        if not os.path.exists(source):
+            file, _, sheet = source.rpartition('#')
+        with contextlib.redirect_stdout(io.StringIO()):
+            raw = utils.load_file_by_extension(file, column_mapping, sheets=[sheet] if sheet else None)
+        columns = [col for col in utils.data_columns(rows) if col in raw.columns]
+        expected = raw.iloc[rows['source_row']][columns].reset_index(drop=True)
+        actual = rows[columns].reset_index(drop=True)
+        # load_files() empties 'NULL' and 'NA' after loading
+        expected = expected.apply(lambda col: col.map(normalize_value)).replace({'NULL': '', 'NA': ''})
+        actual = actual.apply(lambda col: col.map(normalize_value))
+        mismatched += int((expected != actual).any(axis=1).sum())
+    return mismatched
+
+def check_sheet_provenance():
+    """
+    Provenance of the stacked sheets of an Excel file: every row must point to its own sheet, and the
+    row numbers start again at 0 on each sheet.
+    """
+    column_mapping = {'Permit': 'permit_ID', 'Status': 'permit_status'}
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'permits.xlsx')
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame({'Permit': ['A-1', 'A-2'], 'Status': ['Issued', 'Finaled']}).to_excel(writer, sheet_name='2023', index=False)
+            pd.DataFrame({'Permit': ['B-1', 'B-2', 'B-3'], 'Status': ['Issued', 'Issued', 'Finaled']}).to_excel(writer, sheet_name='2024', index=False)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = utils.load_files([path], column_mapping=column_mapping, provenance=True)
+        seconds = time.perf_counter() - start
+
+        expected = pd.DataFrame({'source': [f'{path}#2023'] * 2 + [f'{path}#2024'] * 3, 'source_row': [0, 1, 0, 1, 2]})
+        actual = pd.DataFrame({'source': [df.attrs['source_files'][i] for i in df['source_file']], 'source_row': df['source_row']})
+        comparison = compare_outputs(expected, actual)
+        mismatched = trace_provenance(df, column_mapping)
+        if mismatched:
+            comparison.update(passed=False, error=f"{mismatched} loaded rows don't match the raw row their provenance points to")
+    return {'fixture': '(two-sheet workbook)', 'engine': 'provenance', 'seconds': round(seconds, 3), **comparison}
+
+def normalize_value(value):
+    """
+    Text form of a cell used for comparison: missing values and empty strings are '',
+    whole floats lose their '.0' (CSV round trips turn 12 into 12.0) and text is stripped.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return '' if text.lower() == 'nan' else text
+
+def compare_outputs(expected, actual, date_tolerance_days=0, ignore_order=False, max_cells=20, check_dtypes=False):
+    """
+    Diffs two cleaned DataFrames cell by cell.
+
+    Args:
+        expected (pd.DataFrame): Reference output.
+        actual (pd.DataFrame): Output to check.
+        date_tolerance_days (int): Dates (columns with 'date' in the name) that differ by at most
+            this many days are equal. Dates are compared as dates, so '2023-03-05' equals 3/5/2023.
+        ignore_order (bool): Sort both outputs by all their columns before comparing.
+        max_cells (int): Maximum number of differing cells listed in the result.
+        check_dtypes (bool): Also require the same dtype in every column (e.g. datetime64 against
+            object Timestamps, which look the same as text but are published differently).
+
+    Returns:
+        dict: 'passed', 'missing_columns', 'extra_columns', 'different_dtypes' (column, expected, actual),
+        'rows' (expected, actual), 'different_cells' (count) and 'cells' (first differences: row,
+        column, expected, actual).
+    """
+    columns = [col for col in expected.columns if col in actual.columns]
+    result = {
+        'missing_columns': [col for col in expected.columns if col not in actual.columns],
+        'extra_columns': [col for col in actual.columns if col not in expected.columns],
+        'different_dtypes': [
+            [col, str(expected[col].dtype), str(actual[col].dtype)]
+            for col in columns if check_dtypes and expected[col].dtype != actual[col].dtype
+        ],
+        'rows': [len(expected), len(actual)],
+    }
+
+    expected = expected[columns].reset_index(drop=True).apply(lambda col: col.map(normalize_value))
+    actual = actual[columns].reset_index(drop=True).apply(lambda col: col.map(normalize_value))
+    if ignore_order:
+        expected = expected.sort_values(columns, kind='stable').reset_index(drop=True)
+        actual = actual.sort_values(columns, kind='stable').reset_index(drop=True)
+
+    rows = min(len(expected), len(actual))
+    expected, actual = expected.iloc[:rows], actual.iloc[:rows]
+    different = expected != actual
+
+    date_cols = [col for col in columns if 'date' in col.lower()]
+    for col in date_cols:
+        # Only cells that differ as text need to be parsed
+        candidates = different[col]
+        if not candidates.any():
+            continue
+        before = pd.to_datetime(expected.loc[candidates, col], errors='coerce', format='mixed')
+        after = pd.to_datetime(actual.loc[candidates, col], errors='coerce', format='mixed')
+        same = (before - after).abs() <= pd.Timedelta(days=date_tolerance_days)
+        different.loc[candidates, col] = ~same.fillna(False).astype(bool)
+
+    cells = []
+    for row, col in zip(*np.nonzero(different.to_numpy())):
+        if len(cells) == max_cells:
+            break
+        cells.append([int(row), columns[col], expected.iat[row, col], actual.iat[row, col]])
+
+    result['different_cells'] = int(different.to_numpy().sum())
+    result['cells'] = cells
+    result['passed'] = (not result['missing_columns'] and not result['extra_columns'] and not result['different_dtypes']
+                        and result['rows'][0] == result['rows'][1] and result['different_cells'] == 0)
+    return result
+
+def run_engine(engine, fixture_dir):
+    """
+    Runs an engine on a fixture in the fixture folder. Returns the output and the runtime in seconds.
+    """
+    with open(os.path.join(fixture_dir, 'column_mapping.json')) as f:
+        column_mapping = json.load(f)
+
+    cwd = os.getcwd()
+    os.chdir(fixture_dir)
+    try:
+        files = sorted(utils.get_file_list('raw'))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = engine(files, column_mapping)
+        return df, time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+def run_harness(fixtures_dir=FIXTURES_DIR, engines=None, update_golden=False, date_tolerance_days=0, ignore_order=False):
+    """
+    Runs the utils pipeline and the engines over every fixture and compares the outputs.
+
+    Returns:
+        list of dict: One entry per fixture and engine ('utils' is the check against golden.csv)
+        with the runtime and the comparison (see compare_outputs()).
+    """
+    engines = engines if engines is not None else list(ENGINES)
+    results = []
+
+    for fixture in sorted(os.listdir(fixtures_dir)):
+        fixture_dir = os.path.join(fixtures_dir, fixture)
+        if not os.path.isdir(os.path.join(fixture_dir, 'raw')):
+            continue
+
+        reference, seconds = run_engine(run_utils, fixture_dir)
+        golden_path = os.path.join(fixture_dir, GOLDEN_FILE)
+        if update_golden:
+            reference.to_csv(golden_path, index=False)
+            print(f"📁 Golden output of {fixture} updated ({len(reference)} rows).")
+        if os.path.exists(golden_path):
+            golden = pd.read_csv(golden_path, dtype=str, keep_default_na=False)
+            comparison = compare_outputs(golden, reference, date_tolerance_days, ignore_order)
+        else:
+            comparison = {'passed': False, 'error': f"no {GOLDEN_FILE}, run with --update-golden"}
+        results.append({'fixture': fixture, 'engine': 'utils', 'seconds': round(seconds, 3), **comparison})
+
+        for name in engines:
+            try:
+                output, seconds = run_engine(ENGINES[name], fixture_dir)
+                comparison = compare_outputs(reference, output, date_tolerance_days, ignore_order, check_dtypes=True)
+            except Exception as e:
+                seconds, comparison = None, {'passed': False, 'error': f"{type(e).__name__}: {e}"}
+            results.append({'fixture': fixture, 'engine': name,
+                            'seconds': round(seconds, 3) if seconds is not None else None, **comparison})
+
+    if 'provenance' in engines:
+        results.append(check_sheet_provenance())
+    return results
+
+def print_results(results):
+    for result in results:
+        mark = '✅' if result['passed'] else '❌'
+        timing = f"{result['seconds']:.2f}s" if result['seconds'] is not None else '-'
+        print(f"{mark} {result['fixture']:<24} {result['engine']:<16} {timing:>8}", end='')
+        if 'error' in result:
+            print(f"  {result['error']}")
+            continue
+        print(f"  rows {result['rows'][0]}/{result['rows'][1]}, {result['different_cells']} different cells")
+        if result['missing_columns'] or result['extra_columns']:
+            print(f"    Missing columns: {result['missing_columns']}  Extra columns: {result['extra_columns']}")
+        for col, expected, actual in result['different_dtypes']:
+            print(f"    {col}: dtype {expected}, got {actual}")
+        for row, col, expected, actual in result['cells']:
+            print(f"    row {row}, {col}: expected {expected!r}, got {actual!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the cleaning engines against the utils pipeline and the golden outputs.")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Folder with one folder per fixture AHJ.")
+    parser.add_argument('--engines', nargs='*', choices=list(ENGINES), help="Engines to compare (default: all).")
+    parser.add_argument('--update-golden', action='store_true', help="Save the current utils output as the golden output.")
+    parser.add_argument('--date-tolerance', type=int, default=0, help="Days two dates may differ by.")
+    parser.add_argument('--ignore-order', action='store_true', help="Compare the rows regardless of their order.")
+    parser.add_argument('--report', default=os.path.join(HERE, 'harness_report.json'), help="Where to save the results.")
+    args = parser.parse_args()
+
+    results = run_harness(args.fixtures, args.engines, args.update_golden, args.date_tolerance, args.ignore_order)
+    print_results(results)
+    with open(args.report, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+
+    failed = [r for r in results if not r['passed']]
+    print(f"\n{'❌' if failed else '✅'} {len(results) - len(failed)}/{len(results)} comparisons passed. Report saved to '{args.report}'.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Helper functions used by the cleanser and concatenate notebooks.
+
+Use them as before, e.g. utils.load_files(files) or utils.assign_permit_status(df). They are organized in:
+- mappings:    value mappings and standard columns (loaded with the package, no dependencies)
+- files:       reading the raw exports and saving the cleaned AHJs
+- steps:       the cleaning steps, and clean_dataframe() that runs them all
+- checkpoints: resumable runs of the steps (clean_with_checkpoints())
+- headers:     header reconciliation (load_files_aligned())
+- provenance:  row-level provenance helpers
+- duplicates:  near-duplicate permit detection
+- arrow:       Arrow hand-off to the concatenate stage (needs pyarrow)
+- partitioned: parallel and out-of-core execution of the cleaning steps
+- profiling:   data-quality profile of the cleaned AHJs
+- metrics:     time-to-milestone metrics and cubes for the dashboards
+
+Only the mappings are loaded by 'import utils'. Each module (and pandas, numpy, pyarrow or the
+Excel engine it uses) is imported the first time one of its functions is used, so short-lived
+workers that import utils stay cheap to start (see benchmarks/bench_import.py).
+"""
+import importlib
+import warnings
+
+from .mappings import (
+    project_type_mapping, permit_status_mapping, inspection_status_mapping, standard_columns,
+    header_aliases, address_abbreviations, provenance_columns, provenance_rules
+)
+
+# pandas warns about chained assignment in the cleaning steps. Silenced for this package only,
+# by message so pandas doesn't have to be imported here.
+warnings.filterwarnings('ignore', message=r'\s*A value is trying to be set on a copy of a slice', module=r'utils\.')
+
+# Public functions of each module, imported on first use
+_modules = {
+    'files': [
+        'get_file_list', 'load_files', 'load_file_by_extension', 'excel_engine', 'merge_clean_files', 'final_save'
+    ],
+    'steps': [
+        'get_inspt_failed', 'add_inspt_failed_once_column', 'filter', 'assign_solarAPP_or_traditional',
+        'assign_AHJ', 'assign_project_type', 'map_inspection_status', 'standardize_inspection_status',
+        'assign_last_inspection_fields', 'standardize_format', 'assign_permit_status', 'Merge_Inspections',
+        'Do_Merge_Inspections', 'cleaning_steps', 'clean_dataframe'
+    ],
+    'checkpoints': [
+        'clean_with_checkpoints', 'gc_checkpoints'
+    ],
+    'headers': [
+        'normalize_header', 'infer_column_role', 'infer_column_mapping', 'load_files_aligned'
+    ],
+    'provenance': [
+        'add_provenance', 'is_provenance_column', 'data_columns', 'mark_rule', 'describe_rules'
+    ],
+    'duplicates': [
+        'normalize_address', 'normalize_solarAPP_ID', 'find_near_duplicates', 'flag_near_duplicates',
+        'merge_near_duplicates'
+    ],
+    'arrow': [
+        'arrow_schema', 'publish_arrow', 'open_clean_arrow'
+    ],
+    'partitioned': [
+        'clean_out_of_core', 'clean_parallel'
+    ],
+    'profiling': [
+        'profile_batches', 'profile_clean_folder', 'compare_profiles'
+    ],
+    'metrics': [
+        'permit_metrics', 'metrics_cube', 'update_metrics'
+    ],
+}
+_owners = {name: module for module, names in _modules.items() for name in names}
+
+
+def __getattr__(name):
+    if name in _modules:
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in _owners:
+        value = getattr(importlib.import_module(f'{__name__}.{_owners[name]}'), name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules) | set(_owners))
@@ -0,0 +1,110 @@
+"""
+Arrow hand-off between the cleanser and the concatenate stage. pyarrow is imported when used.
+"""
+import pandas as pd
+import os
+
+from .mappings import standard_columns
+
+# ARROW HAND-OFF
+# Cleaned AHJs are published as Arrow IPC files that all share the same schema (every standard column
+# as a string), so the concatenate stage can memory-map them and stack them without parsing or copying.
+
+def arrow_schema():
+    """
+    Schema of the published Arrow files: every column of utils.standard_columns as a string.
+    """
+    import pyarrow as pa  # only needed for the Arrow hand-off
+
+    return pa.schema([(col, pa.string()) for col in standard_columns])
+
+def publish_arrow(df, folder='clean', name=None):
+    """
+    Saves a cleaned DataFrame as '<AHJ>.arrow' (Arrow IPC file format) in the clean folder.
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame with all the standard columns.
+        folder (str): Folder with the cleaned AHJ files.
+        name (str, optional): File name without extension (default: current folder name, as in assign_AHJ()).
+
+    Returns:
+        str: Path of the saved file.
+    """
+    import pyarrow as pa
+
+    name = name or os.path.basename(os.getcwd())
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f'{name}.arrow')
+
+    columns = {}
+    for col in standard_columns:
+        values = df[col]
+        columns[col] = values.astype(str).where(values.notna(), None)
+    table = pa.Table.from_pandas(pd.DataFrame(columns), schema=arrow_schema(), preserve_index=False)
+
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    print(f"📁 Cleaned DataFrame published to '{path}'.")
+    return path
+
+def open_clean_arrow(folder='clean', convert_csv=False):
+    """
+    Memory-maps every cleaned AHJ Arrow file in a folder and stacks them into a single table.
+    No data is read or copied until it is used; files with a different schema are reported and skipped.
+
+    AHJs only saved as '<AHJ>.csv' (cleaned before the Arrow hand-off) are reported, as they would be
+    missing from the merge. With convert_csv, they are published as Arrow files first and included.
+
+    Args:
+        folder (str): Folder with the '<AHJ>.arrow' files.
+        convert_csv (bool): Publish the CSV-only AHJs as Arrow files (see publish_arrow()).
+
+    Returns:
+        pyarrow.Table: Merged view of all the AHJs (use .to_pandas() to get a DataFrame).
+    """
+    import pyarrow as pa
+
+    files = set(os.listdir(folder))
+    csv_only = sorted(
+        file for file in files
+        if file.endswith('.csv') and file[:-len('.csv')] + '.arrow' not in files
+    )
+    if csv_only and convert_csv:
+        for file in csv_only:
+            try:
+                df = pd.read_csv(os.path.join(folder, file), dtype=str)
+                if df['AHJ'].nunique() > 1:
+                    print(f"⏭️  {file} has several AHJs (merged output?) — not converted.")
+                    continue
+                publish_arrow(df, folder, name=file[:-len('.csv')])
+            except Exception as e:
+                print(f"❌ Error converting {file}: {e}")
+    elif csv_only:
+        print(f"⚠️  {len(csv_only)} AHJs only saved as CSV are not included — Need to publish them "
+              f"(convert_csv=True): {csv_only}")
+
+    schema = arrow_schema()
+    tables = []
+    for file in sorted(os.listdir(folder)):
+        if not file.endswith('.arrow'):
+            continue
+        try:
+            table = pa.ipc.open_file(pa.memory_map(os.path.join(folder, file))).read_all()
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+            continue
+
+        if not table.schema.equals(schema):
+            print(f"⚠️  Schema mismatch in file: {file}")
+            print(f"    Missing: {sorted(set(schema.names) - set(table.schema.names))}")
+            print(f"    Extra:   {sorted(set(table.schema.names) - set(schema.names))}")
+            continue
+        tables.append(table)
+
+    if not tables:
+        print("⚠️  No valid files found for merging.")
+        return schema.empty_table()
+
+    merged = pa.concat_tables(tables)
+    print(f"✅ Mapped {len(tables)} files into a merged view with {merged.num_rows} rows.")
+    return merged
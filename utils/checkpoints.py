@@ -0,0 +1,172 @@
+"""
+Resumable runs of the load and cleaning steps: the output of every step is checkpointed, so a failure
+late in the pipeline (e.g. final_save() on an Excel file that is open) doesn't mean starting over.
+"""
+import pandas as pd
+import os
+import time
+import glob
+import hashlib
+import inspect
+import functools
+
+from . import mappings, provenance as provenance_helpers
+from .files import load_files, final_save
+from .steps import cleaning_steps
+
+# CHECKPOINTS
+# Each checkpoint is a pickle named '<run>-<step number>-<step>-<key>.pkl'. The run hashes the content of
+# the raw files, the column mapping, the AHJ (folder name), the pandas version and the code of the modules
+# the steps share (value mappings and provenance helpers). The key of a step hashes the key of the step
+# before it with the step's code and arguments, so a changed file, mapping or shared module starts a new
+# run, and a changed step invalidates its checkpoint and all the following ones.
+
+def clean_with_checkpoints(file_paths, column_mapping, checkpoint_dir='checkpoints', steps=None, provenance=False,
+                           filename='Clean.xlsx', resume=True, keep_runs=3, max_age_days=14):
+    """
+    Loads, renames and cleans the files like the notebook cells, then runs final_save(), checkpointing
+    the DataFrame after every step. A re-run resumes after the last step with a valid checkpoint.
+
+    Args:
+        file_paths (list of str): Raw files, as given to load_files().
+        column_mapping (dict): Raw column name to standard column name (rename cell).
+        checkpoint_dir (str): Folder for the checkpoints.
+        steps (list of callables, optional): Steps run after the rename, each taking and returning the
+            DataFrame (use functools.partial for arguments, e.g. partial(utils.filter, column=..., values_to_keep=...)).
+            Defaults to utils.cleaning_steps, the steps of clean_dataframe().
+        provenance (bool): Passed to load_files().
+        filename (str): Excel file saved by final_save(). None to skip saving.
+        resume (bool): Resume from the checkpoints. False runs every step again (and overwrites them).
+        keep_runs, max_age_days: Retention policy applied at the end, see gc_checkpoints().
+
+    Returns:
+        pd.DataFrame: The cleaned DataFrame.
+    """
+    steps = list(cleaning_steps if steps is None else steps)
+    pipeline = [
+        functools.partial(load_files, file_paths, provenance=provenance),
+        functools.partial(_rename, column_mapping=column_mapping)
+    ] + steps
+    names = [_step_name(step) for step in pipeline]
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    run = _run_hash(file_paths, column_mapping, provenance)
+    keys, key = [], run
+    for step in pipeline:
+        key = _hash_text(key + _step_signature(step))
+        keys.append(key)
+    paths = [
+        os.path.join(checkpoint_dir, f'{run[:12]}-{i:02d}-{name}-{key[:12]}.pkl')
+        for i, (name, key) in enumerate(zip(names, keys))
+    ]
+
+    df, start = None, 0
+    if resume:
+        for i in reversed(range(len(pipeline))):
+            if not os.path.exists(paths[i]):
+                continue
+            try:
+                df = pd.read_pickle(paths[i])
+            except Exception as e:
+                print(f"⚠️  Checkpoint '{paths[i]}' can't be read ({e}) — removed.")
+                os.remove(paths[i])
+                continue
+            os.utime(paths[i])  # last used, for the retention policy
+            start = i + 1
+            print(f"⏩ Resumed after step {start}/{len(pipeline)} '{names[i]}' from checkpoint '{paths[i]}'.")
+            break
+
+    for i in range(start, len(pipeline)):
+        begin = time.perf_counter()
+        df = pipeline[i]() if i == 0 else pipeline[i](df)
+        _write_checkpoint(df, paths[i])
+        print(f"💾 Step {i + 1}/{len(pipeline)} '{names[i]}' done in {time.perf_counter() - begin:.1f}s, checkpoint saved.")
+
+    if filename is not None:
+        final_save(df, filename)
+    gc_checkpoints(checkpoint_dir, keep_runs=keep_runs, max_age_days=max_age_days, current_run=run)
+    return df
+
+def gc_checkpoints(checkpoint_dir='checkpoints', keep_runs=3, max_age_days=14, current_run=None):
+    """
+    Retention policy: keeps the checkpoints of the keep_runs most recently used runs that were used in
+    the last max_age_days, and deletes the others (and leftovers of interrupted writes).
+
+    Args:
+        checkpoint_dir (str): Folder with the checkpoints.
+        keep_runs (int): Number of runs kept.
+        max_age_days (float): Runs not used for longer are deleted.
+        current_run (str, optional): Run hash that is always kept.
+
+    Returns:
+        int: Number of files deleted.
+    """
+    runs = {}
+    for path in glob.glob(os.path.join(checkpoint_dir, '*.pkl')):
+        run = os.path.basename(path).split('-')[0]
+        runs.setdefault(run, []).append(path)
+    last_used = {run: max(os.path.getmtime(path) for path in paths) for run, paths in runs.items()}
+
+    now = time.time()
+    ordered = sorted(runs, key=last_used.get, reverse=True)
+    expired = [
+        run for rank, run in enumerate(ordered)
+        if rank >= keep_runs or now - last_used[run] > max_age_days * 86400
+    ]
+    if current_run is not None:
+        expired = [run for run in expired if run != current_run[:12]]
+
+    deleted = [path for run in expired for path in runs[run]]
+    deleted += [path for path in glob.glob(os.path.join(checkpoint_dir, '*.tmp')) if now - os.path.getmtime(path) > 86400]
+    for path in deleted:
+        os.remove(path)
+    if deleted:
+        print(f"🧹 Deleted {len(deleted)} old checkpoint files of {len(expired)} runs.")
+    return len(deleted)
+
+def _rename(df, column_mapping):
+    return df.rename(columns=column_mapping)
+
+def _write_checkpoint(df, path):
+    # Written to a temporary file first, so an interrupted write never looks like a valid checkpoint
+    tmp_path = path + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+def _hash_text(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def _run_hash(file_paths, column_mapping, provenance):
+    """
+    Hash of the content of the raw files and of everything else the first steps depend on.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in file_paths:
+        digest.update(path.encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(repr(sorted(column_mapping.items())).encode())
+    digest.update(repr((provenance, os.path.basename(os.getcwd()), pd.__version__)).encode())
+    for module in (mappings, provenance_helpers):
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+def _step_name(step):
+    func = step.func if isinstance(step, functools.partial) else step
+    return getattr(func, '__name__', type(func).__name__).strip('_<>') or 'step'
+
+def _step_signature(step):
+    """
+    Code and arguments of a step. The code of the whole module the step is defined in is included,
+    so editing a helper it calls (e.g. Merge_Inspections for Do_Merge_Inspections) invalidates it too.
+    """
+    args = ''
+    if isinstance(step, functools.partial):
+        args = repr(step.args) + repr(sorted(step.keywords.items()))
+        step = step.func
+    try:
+        code = inspect.getsource(inspect.getmodule(step)) + inspect.getsource(step)
+    except (OSError, TypeError):
+        code = getattr(step, '__qualname__', repr(step))
+    return code + args
@@ -0,0 +1,286 @@
+"""
+Near-duplicate permits: the same installation exported twice under slightly different permit_IDs or
+address spellings, which the exact drop_duplicates() of load_files() and standardize_format() keeps.
+"""
+import pandas as pd
+import numpy as np
+import difflib
+
+from .mappings import address_abbreviations
+from .provenance import data_columns, mark_rule
+
+# NEAR-DUPLICATES
+# Comparing every pair of permits doesn't scale to the merged dataset, so rows are only compared within
+# blocks of rows that share a key: street number + start of the street name (within the AHJ), street
+# number + ZIP code, or solarAPP_ID. Blocks are small, so the candidate pairs grow with the number of
+# rows instead of its square. Each candidate pair is then scored with the weights below.
+
+near_duplicate_weights = {
+    'address': 0.5,           # similarity of the normalized addresses
+    'permit_ID': 0.3,         # similarity of the normalized permit_IDs
+    'submission_date': 0.2    # 1 if the submission dates are within max_days, 0.5 if one is missing
+}
+
+_abbreviations = r'\b(' + '|'.join(sorted(address_abbreviations, key=len, reverse=True)) + r')\b'
+_directions = r'(?:n|s|e|w|ne|nw|se|sw)'
+
+
+def normalize_address(addresses):
+    """
+    Normalizes addresses for comparison: lowercase, punctuation removed, '#' read as 'unit' and the
+    words of utils.address_abbreviations abbreviated.
+    e.g. '107 North Oak Street, Apt. #2' -> '107 n oak st unit 2'.
+
+    Args:
+        addresses (pd.Series): Raw addresses.
+
+    Returns:
+        pd.Series: Normalized addresses ('' when missing).
+    """
+    text = addresses.fillna('').astype(str).str.lower()
+    text = text.str.replace('#', ' unit ', regex=False)
+    text = text.str.replace(r'[^a-z0-9]+', ' ', regex=True)
+    text = text.str.replace(_abbreviations, lambda m: address_abbreviations[m.group(1)], regex=True)
+    text = text.str.replace(r'\bunit( unit)+\b', 'unit', regex=True)
+    return text.str.strip()
+
+def normalize_solarAPP_ID(ids):
+    """
+    Uppercases IDs and keeps only letters and digits (e.g. ' sa-2023-003 ' -> 'SA2023003').
+    Missing values and 'nan'/'none'/'null' become ''. Also used for permit_IDs.
+
+    Args:
+        ids (pd.Series): Raw IDs.
+
+    Returns:
+        pd.Series: Normalized IDs.
+    """
+    text = ids.fillna('').astype(str).str.upper().str.replace(r'[^A-Z0-9]', '', regex=True)
+    return text.mask(text.isin(['NAN', 'NONE', 'NULL']), '')
+
+def find_near_duplicates(df, threshold=0.85, max_days=30, max_block_size=1000, prefix_length=3):
+    """
+    Finds pairs of rows that are probably the same permit.
+
+    Rows sharing a solarAPP_ID are duplicates and rows with different solarAPP_IDs are not. The other
+    pairs get a score between 0 and 1 from their address, permit_ID and submission date (see
+    near_duplicate_weights). Only rows in the same block are compared (see the note above).
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame (one AHJ or the merged dataset).
+        threshold (float): Minimum score of the pairs returned.
+        max_days (int): Submission dates at most this many days apart count as the same.
+        max_block_size (int): Blocks with more rows are skipped (reported), as they are usually
+            placeholder addresses and would add too many pairs.
+        prefix_length (int): Characters of the street name used in the street block key.
+
+    Returns:
+        pd.DataFrame: One row per pair, best first, with the index labels ('row_a', 'row_b'), permit_IDs,
+        addresses, the similarities, the 'score' and the row positions ('pos_a', 'pos_b'). Review it and
+        drop the false positives before passing it to flag_near_duplicates() or merge_near_duplicates().
+    """
+    n = len(df)
+    empty = pd.Series('', index=df.index)
+    address = normalize_address(df['address']) if 'address' in df.columns else empty
+    solar_id = normalize_solarAPP_ID(df['solarAPP_ID']) if 'solarAPP_ID' in df.columns else empty
+    permit_id = normalize_solarAPP_ID(df['permit_ID']) if 'permit_ID' in df.columns else empty
+    ahj = df['AHJ'].fillna('').astype(str) if 'AHJ' in df.columns else empty
+    if 'permit_submission_date' in df.columns:
+        submitted = pd.to_datetime(df['permit_submission_date'], errors='coerce', format='mixed')
+    else:
+        submitted = pd.Series(pd.NaT, index=df.index)
+
+    # Block keys (NaN when the part they need is missing)
+    number = address.str.extract(r'^(\d+)\b', expand=False)
+    street = address.str.extract(rf'^\d+ (?:{_directions} )?([a-z0-9]+)', expand=False).str[:prefix_length]
+    zip_code = address.str.extract(r' (\d{5})(?: \d{4})?$', expand=False)
+    keys = [
+        ahj + '|' + number + '|' + street,
+        number + '|' + zip_code,
+        solar_id.mask(solar_id == '')
+    ]
+
+    candidates, skipped = [], 0
+    for key in keys:
+        pairs, oversized = _block_pairs(key, max_block_size)
+        candidates.append(pairs)
+        skipped += oversized
+    pairs = pd.concat(candidates, ignore_index=True).drop_duplicates()
+    pos_a, pos_b = pairs['pos_a'].to_numpy(), pairs['pos_b'].to_numpy()
+
+    solar_a, solar_b = solar_id.to_numpy()[pos_a], solar_id.to_numpy()[pos_b]
+    same_solar = (solar_a != '') & (solar_a == solar_b)
+    other_solar = (solar_a != '') & (solar_b != '') & (solar_a != solar_b)
+
+    dates_a, dates_b = submitted.to_numpy()[pos_a], submitted.to_numpy()[pos_b]
+    both_dates = ~(pd.isna(dates_a) | pd.isna(dates_b))
+    close = np.abs(dates_a - dates_b) <= np.timedelta64(max_days, 'D')
+    date_score = np.where(both_dates, close, 0.5)
+
+    address_similarity = _similarity(address.to_numpy()[pos_a], address.to_numpy()[pos_b])
+    id_similarity = _similarity(permit_id.to_numpy()[pos_a], permit_id.to_numpy()[pos_b])
+    score = (near_duplicate_weights['address'] * address_similarity
+             + near_duplicate_weights['permit_ID'] * id_similarity
+             + near_duplicate_weights['submission_date'] * date_score)
+    score = np.where(same_solar, 1.0, np.where(other_solar, 0.0, score))
+
+    keep = score >= threshold
+    labels = df.index.to_numpy()
+    result = pd.DataFrame({
+        'row_a': labels[pos_a[keep]],
+        'row_b': labels[pos_b[keep]],
+        'permit_ID_a': df['permit_ID'].to_numpy()[pos_a[keep]] if 'permit_ID' in df.columns else '',
+        'permit_ID_b': df['permit_ID'].to_numpy()[pos_b[keep]] if 'permit_ID' in df.columns else '',
+        'address_a': address.to_numpy()[pos_a[keep]],
+        'address_b': address.to_numpy()[pos_b[keep]],
+        'address_similarity': address_similarity[keep].round(3),
+        'permit_ID_similarity': id_similarity[keep].round(3),
+        'same_solarAPP_ID': same_solar[keep],
+        'score': score[keep].round(3),
+        'pos_a': pos_a[keep],
+        'pos_b': pos_b[keep]
+    }).sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+
+    print(f"🔍 {n} rows -> {len(pairs)} candidate pairs compared -> {len(result)} near-duplicate pairs (score >= {threshold}).")
+    if skipped:
+        print(f"⚠️  {skipped} blocks with more than {max_block_size} rows skipped — Need to check these addresses!")
+    return result
+
+def flag_near_duplicates(df, pairs=None, **kwargs):
+    """
+    Adds the 'near_duplicate_of' column: for every row that duplicates another one, the permit_ID
+    of the row kept for its group (the most complete one), '' otherwise.
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame.
+        pairs (pd.DataFrame, optional): Result of find_near_duplicates(df). Computed when not given.
+        **kwargs: Passed to find_near_duplicates().
+
+    Returns:
+        pd.DataFrame: The DataFrame with the 'near_duplicate_of' column.
+    """
+    if pairs is None:
+        pairs = find_near_duplicates(df, **kwargs)
+    group, kept = _duplicate_groups(df, pairs)
+
+    flagged = (group >= 0) & ~kept
+    kept_ids = pd.Series(df['permit_ID'].to_numpy()[kept], index=group[kept])
+    values = np.full(len(df), '', dtype=object)
+    values[flagged] = kept_ids.reindex(group[flagged]).to_numpy()
+
+    df = df.copy()
+    # Before the provenance columns, which stay last
+    df.insert(len(data_columns(df)), 'near_duplicate_of', values)
+    print(f"✅ 'near_duplicate_of' column added. {flagged.sum()} rows flagged as near-duplicates.")
+    return df
+
+def merge_near_duplicates(df, pairs=None, **kwargs):
+    """
+    Keeps one row per group of near-duplicates (the most complete one) and drops the others.
+    Empty permit-level cells of the kept row are filled from the dropped rows, most complete first.
+    Its inspections are kept as they are: inspection histories of different rows are not mixed.
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame.
+        pairs (pd.DataFrame, optional): Result of find_near_duplicates(df). Computed when not given.
+        **kwargs: Passed to find_near_duplicates().
+
+    Returns:
+        pd.DataFrame: The DataFrame without the near-duplicates.
+    """
+    if pairs is None:
+        pairs = find_near_duplicates(df, **kwargs)
+    group, kept = _duplicate_groups(df, pairs)
+    if not (group >= 0).any():
+        print("✅ No near-duplicates to merge.")
+        return df
+
+    df = df.copy()
+    columns = [col for col in data_columns(df) if not col.startswith('inspt_')]
+    members = np.flatnonzero(group >= 0)
+    # Kept row first, then the most complete ones
+    order = np.lexsort((-_filled_counts(df.iloc[members]).to_numpy(), ~kept[members], group[members]))
+    members = members[order]
+
+    block = df.iloc[members][columns]
+    values = block.mask(block.astype(str).apply(lambda col: col.str.strip()) == '')
+    filled = values.groupby(group[members], sort=False).first()
+
+    kept_pos = np.flatnonzero(kept)
+    current = df.iloc[kept_pos][columns]
+    fill = filled.loc[group[kept_pos]].set_axis(current.index)
+    missing = current.isna() | (current.astype(str).apply(lambda col: col.str.strip()) == '')
+    updated = current.mask(missing & fill.notna(), fill)
+    changed = (updated.ne(current) & ~(updated.isna() & current.isna())).any(axis=1).to_numpy()
+    for col in columns:
+        df.iloc[kept_pos, df.columns.get_loc(col)] = updated[col].to_numpy()
+
+    touched = np.zeros(len(df), dtype=bool)
+    touched[kept_pos] = changed
+    mark_rule(df, 'merged_near_duplicates', touched)
+
+    dropped = (group >= 0) & ~kept
+    df = df[~dropped]
+    print(f"🔁 {dropped.sum()} near-duplicate rows merged into {len(kept_pos)} permits ({changed.sum()} filled with missing values).")
+    return df
+
+def _block_pairs(key, max_block_size):
+    """
+    Position pairs (pos_a < pos_b) of the rows sharing a key, and the number of oversized blocks skipped.
+    """
+    keyed = pd.DataFrame({'key': key.to_numpy(), 'pos': np.arange(len(key))}).dropna()
+    sizes = keyed['key'].map(keyed['key'].value_counts())
+    oversized = keyed.loc[sizes > max_block_size, 'key'].nunique()
+    keyed = keyed[(sizes > 1) & (sizes <= max_block_size)]
+    pairs = keyed.merge(keyed, on='key', suffixes=('_a', '_b'))
+    pairs = pairs[pairs['pos_a'] < pairs['pos_b']]
+    return pairs[['pos_a', 'pos_b']], oversized
+
+def _similarity(a, b):
+    """
+    difflib ratio of each pair of strings (1 when equal, 0 when one is empty).
+    """
+    return np.array([
+        1.0 if x == y and x else
+        0.0 if not x or not y else
+        difflib.SequenceMatcher(None, x, y, autojunk=False).ratio()
+        for x, y in zip(a, b)
+    ], dtype=float)
+
+def _filled_counts(df):
+    cols = data_columns(df)
+    return (df[cols].notna() & (df[cols].astype(str).apply(lambda col: col.str.strip()) != '')).sum(axis=1)
+
+def _duplicate_groups(df, pairs):
+    """
+    Connected groups of the pairs (a row duplicating b and b duplicating c are one group).
+
+    Returns:
+        tuple: Group of each row position (-1 when it has no near-duplicate), and whether each row
+        is the one kept for its group (the most complete one, the first on ties).
+    """
+    parent = {}
+
+    def root(pos):
+        while parent.setdefault(pos, pos) != pos:
+            parent[pos] = parent[parent[pos]]
+            pos = parent[pos]
+        return pos
+
+    for a, b in zip(pairs['pos_a'], pairs['pos_b']):
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    group = np.full(len(df), -1, dtype=np.int64)
+    for pos in parent:
+        group[pos] = root(pos)
+
+    kept = np.zeros(len(df), dtype=bool)
+    members = np.flatnonzero(group >= 0)
+    if len(members):
+        filled = _filled_counts(df.iloc[members]).to_numpy()
+        best = pd.DataFrame({'group': group[members], 'filled': filled, 'pos': members})
+        best = best.sort_values(['group', 'filled', 'pos'], ascending=[True, False, True]).drop_duplicates('group')
+        kept[best['pos'].to_numpy()] = True
+    return group, kept
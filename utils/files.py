@@ -0,0 +1,254 @@
+"""
+Reading the raw exports and saving the cleaned AHJs.
+"""
+import pandas as pd
+import os
+import time
+
+from .mappings import standard_columns
+from .provenance import add_provenance, data_columns, _add_sources
+
+def get_file_list(folder='raw', extensions=('xlsx', 'csv')):
+
+    """
+    Returns a list of file paths in the given folder that match the provided extensions.
+    
+    Args:
+        folder (str): Subdirectory containing the files.
+        extensions (tuple): File extensions to include (e.g., ('xlsx', 'csv')).
+
+    Returns:
+        list of str: Full paths to matching files.
+    """
+    return [
+        os.path.join(folder, file)
+        for file in os.listdir(folder)
+        if file.lower().endswith(extensions)
+    ]
+
+def load_files(file_paths, loader=None, provenance=False, column_mapping=None, keep_columns=()):
+    """
+    Concatenates multiple CSV/XLSX files if their column headers match in order.
+    Drops fully duplicated rows in the final result.
+
+    Args:
+        file_paths (list of str): Paths to the files to be concatenated.
+        loader (callable, optional): Function that reads one path into a DataFrame
+            (default: load_file_by_extension).
+        provenance (bool): Add the utils.provenance_columns, so every cleaned row can be traced
+            back to its raw file (and sheet) and row, and list the sources in df.attrs['source_files']
+            (see add_provenance()).
+        column_mapping (dict, optional): Only read the mapped columns (see load_file_by_extension()).
+        keep_columns (list of str): Other raw columns to read with a column_mapping, e.g. the ones
+            used with utils.filter().
+
+    Returns:
+        pd.DataFrame: Cleaned DataFrame.
+    """
+    if loader is None:
+        loader = lambda path: load_file_by_extension(path, column_mapping, keep_columns)  # noqa: E731
+
+    if len(file_paths) == 0:
+        print("⚠️  No files provided.")
+        return pd.DataFrame()
+
+    if len(file_paths) == 1:
+        file = file_paths[0]
+        try:
+            df = loader(file)
+            print(f"✅ Loaded single file '{file}' with {len(df)} rows.")
+            if provenance:
+                sources = []
+                df = _add_sources(df, file, sources)
+                df.attrs['source_files'] = sources
+            return df.drop_duplicates(subset=data_columns(df))
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+            return pd.DataFrame()
+
+    concatenated_df = pd.DataFrame()
+    sources = []
+    base_columns = None
+    total_rows_before_dedup = 0
+
+    for file in file_paths:
+        try:
+            df = loader(file)
+            print(f"📄 File '{file}' loaded with {len(df)} rows.")
+            if provenance:
+                df = _add_sources(df, file, sources)
+
+            if base_columns is None:
+                base_columns = list(df.columns)
+                concatenated_df = df
+            elif list(df.columns) == base_columns:
+                concatenated_df = pd.concat([concatenated_df, df], ignore_index=True)
+            else:
+                print(f"⚠️  Header mismatch in file: {file}")
+                print(f"    Expected: {base_columns}")
+                print(f"    Found:    {list(df.columns)}")
+
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+
+    # Remove fully empty rows and drop duplicates
+    concatenated_df.dropna(how='all', subset=data_columns(concatenated_df), inplace=True)
+    total_rows_before_dedup = len(concatenated_df)
+    cleaned_df = concatenated_df.drop_duplicates(subset=data_columns(concatenated_df))
+
+    # Replace NULL by empty
+    cleaned_df = cleaned_df.replace('NULL', '')
+    cleaned_df = cleaned_df.replace('NA', '')
+
+
+    print(f"\n✅ Finished merging {len(file_paths)} files.")
+    print(f"📊 Total rows before deduplication: {total_rows_before_dedup}")
+    print(f"📉 Rows after deduplication: {len(cleaned_df)}")
+
+    if provenance:
+        cleaned_df.attrs['source_files'] = sources
+        print(f"🔎 Provenance 'source_file' ids: {dict(enumerate(sources))}")
+
+    return cleaned_df
+
+def load_file_by_extension(file_path, column_mapping=None, keep_columns=(), sheets=None):
+    """
+    Loads a file based on its extension.
+    Supports .xlsx and .csv.
+
+    With a column_mapping, only the mapped columns, the ones that already have a standard name or
+    are named 'DESCRIPTION' (used by the cleaning steps) and keep_columns are parsed, and for Excel
+    files the rows of every relevant sheet are stacked: the sheets that have the permit_ID column,
+    or the same columns as the first relevant sheet (so a summary sheet isn't). Excel files are read
+    with the fastest engine available (see excel_engine()) and the time spent on each sheet is printed.
+
+    Args:
+        file_path (str): Path to the file.
+        column_mapping (dict, optional): Raw to standard column names, as in the notebook's rename cell.
+        keep_columns (list of str): Other raw columns to read (e.g. one used with utils.filter()).
+        sheets (list of str, optional): Excel sheets to read. Default: the relevant sheets when a
+            column_mapping is given, otherwise the first sheet.
+
+    Returns:
+        pd.DataFrame
+    """
+    usecols = None
+    if column_mapping:
+        wanted = set(column_mapping) | set(standard_columns) | {'DESCRIPTION'} | set(keep_columns)
+        usecols = lambda col: col in wanted  # noqa: E731
+
+    ext = os.path.splitext(file_path)[-1].lower()
+    if ext == '.xlsx':
+        return _read_excel_sheets(file_path, usecols, sheets, column_mapping)
+    elif ext == '.csv':
+        return pd.read_csv(file_path, usecols=usecols)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+def excel_engine():
+    """
+    Fastest engine available for pd.read_excel: 'calamine' when python-calamine is installed
+    (pip install python-calamine, needs pandas 2.2 or newer), otherwise pandas' default (openpyxl).
+    """
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    major, minor = (int(part) for part in pd.__version__.split('.')[:2])
+    return 'calamine' if (major, minor) >= (2, 2) else None
+
+def _read_excel_sheets(file_path, usecols, sheets, column_mapping=None):
+    """
+    Reads the requested (or relevant) sheets of an Excel file and stacks their rows.
+    """
+    engine = excel_engine()
+    with pd.ExcelFile(file_path, engine=engine) as xls:
+        # Without a mapping, only the first sheet (as pd.read_excel does). With one, every sheet
+        # is tried and only the relevant ones are kept (see load_file_by_extension()).
+        select = sheets is None and bool(usecols)
+        if sheets is None:
+            sheets = xls.sheet_names if usecols else xls.sheet_names[:1]
+        id_columns = {'permit_ID'} | {raw for raw, col in (column_mapping or {}).items() if col == 'permit_ID'}
+
+        frames, kept = [], []
+        for sheet in sheets:
+            start = time.perf_counter()
+            df = xls.parse(sheet, usecols=usecols)
+            elapsed = time.perf_counter() - start
+            if len(df.columns) == 0:
+                continue
+            # Without the permit ID, the sheet must have the same columns as the first one kept. When the
+            # mapping has no permit ID column, the first sheet with wanted columns is kept as reference.
+            has_id = bool(id_columns & set(df.columns)) or (not frames and id_columns == {'permit_ID'})
+            if select and not has_id and not (frames and list(df.columns) == list(frames[0].columns)):
+                print(f"⏭️  Sheet '{sheet}' of '{file_path}' skipped: no permit ID column and other columns "
+                      f"than the sheets kept.")
+                continue
+            frames.append(df)
+            kept.append(sheet)
+            print(f"⏱️  Sheet '{sheet}' of '{file_path}': {len(df)} rows x {len(df.columns)} columns "
+                  f"in {elapsed:.2f}s ({engine or 'default engine'}).")
+
+    if not frames:
+        print(f"⚠️  No sheet of '{file_path}' has the mapped columns.")
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # Sheet and rows of each stacked block, so provenance can number the rows per sheet
+    df.attrs['sheets'] = [(sheet, len(frame)) for sheet, frame in zip(kept, frames)]
+    return df
+
+def merge_clean_files(folder='clean', output='Clean_merged.csv'):
+    """
+    Concatenates the cleaned AHJ files (one CSV per AHJ) in a folder into a single file,
+    like the first cell of concatenate.ipynb. Files whose columns don't match
+    utils.standard_columns are reported and skipped.
+
+    Args:
+        folder (str): Folder with the cleaned AHJ files.
+        output (str): Path of the merged CSV file.
+
+    Returns:
+        pd.DataFrame: Merged DataFrame.
+    """
+    valid_dfs = []
+    for file in sorted(os.listdir(folder)):
+        path = os.path.join(folder, file)
+        if not file.endswith('.csv') or os.path.abspath(path) == os.path.abspath(output):
+            continue
+        try:
+            df = pd.read_csv(path)
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+            continue
+
+        missing = set(standard_columns) - set(df.columns)
+        extra = set(df.columns) - set(standard_columns)
+        if missing or extra:
+            print(f"⚠️  Header mismatch in file: {file}")
+            print(f"    Missing: {sorted(missing)}")
+            print(f"    Extra:   {sorted(extra)}")
+            continue
+        valid_dfs.append(df[standard_columns])
+
+    if not valid_dfs:
+        print("⚠️  No valid files found for merging.")
+        return pd.DataFrame(columns=standard_columns)
+
+    combined_df = pd.concat(valid_dfs, ignore_index=True)
+    combined_df.to_csv(output, index=False)
+    print(f"✅ Merged {len(valid_dfs)} files into '{output}' with {len(combined_df)} rows.")
+    return combined_df
+
+def final_save(df, filename='Clean.xlsx', sheet_name='Clean'):
+    """
+    Saves the given DataFrame to an Excel file.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to save.
+        filename (str): Output filename (default: 'Clean.xlsx').
+        sheet_name (str): Sheet name inside the Excel file (default: 'Clean').
+    """
+    df.to_excel(filename, sheet_name=sheet_name, index=False)
+    print(f"📁 Cleaned DataFrame saved to '{filename}'.")
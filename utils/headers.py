@@ -0,0 +1,207 @@
+"""
+Header reconciliation of raw files whose columns don't match the known mapping.
+"""
+import pandas as pd
+import os
+import re
+import json
+import difflib
+
+from .files import load_file_by_extension
+from .mappings import header_aliases, inspection_status_mapping, permit_status_mapping, standard_columns
+from .provenance import data_columns, _add_sources
+
+# HEADER RECONCILIATION
+# Matches the raw headers of each file to the standard columns, so files from AHJs that changed
+# their export format can be loaded together instead of being skipped by load_files().
+
+def normalize_header(name):
+    """
+    Lowercases a header and replaces anything that is not a letter or a digit by '_'
+    (e.g. 'Permit #' -> 'permit', 'Issued Date' -> 'issued_date').
+    """
+    return re.sub(r'[^a-z0-9]+', '_', str(name).strip().lower()).strip('_')
+
+def infer_column_role(series, sample_size=500):
+    """
+    Guesses what a column holds from a sample of its non-empty values.
+
+    Returns:
+        str or None: 'date', 'inspection_status', 'permit_status' or None if unclear.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'date'
+
+    sample = series.dropna().astype(str).str.strip()
+    sample = sample[sample != ''].head(sample_size)
+    if sample.empty:
+        return None
+
+    if sample.str.match(r'^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}([ T]\d{1,2}:\d{2}(:\d{2})?)?$').mean() >= 0.8:
+        return 'date'
+
+    values = sample.str.lower()
+    inspection_share = values.isin(list(inspection_status_mapping)).mean()
+    permit_share = values.isin(list(permit_status_mapping)).mean()
+    if max(inspection_share, permit_share) >= 0.6:
+        return 'inspection_status' if inspection_share > permit_share else 'permit_status'
+    return None
+
+def infer_column_mapping(df, known=None, min_similarity=0.85):
+    """
+    Matches the headers of a DataFrame to the standard columns (plus 'DESCRIPTION').
+
+    Headers are matched, in order of priority, by:
+    1. known (e.g. the mapping saved for this AHJ).
+    2. Normalized name equal to a standard column or to an entry of utils.header_aliases.
+    3. Name similarity to those names of at least min_similarity.
+    4. The role of the column content (dates, inspection or permit status vocabulary).
+    Each standard column is assigned at most once. Matches of 2. and 3. that contradict the content are
+    corrected with the content role (e.g. a 'Status' column holding inspection results becomes 'inspt_status_1',
+    and a non-date column is never matched to a date column).
+
+    Args:
+        df (pd.DataFrame): Raw DataFrame.
+        known (dict, optional): Raw header to standard column mappings that take precedence.
+        min_similarity (float): Minimum difflib similarity ratio for a fuzzy name match.
+
+    Returns:
+        dict: Raw header to standard column, for the headers that could be matched.
+    """
+    known = known or {}
+    targets = [col for col in standard_columns if col not in ('AHJ', 'inspt_failed_once')] + ['DESCRIPTION']
+    names = {normalize_header(col): col for col in targets}
+    names.update(header_aliases)
+    status_columns = {'inspection_status': 'inspt_status_1', 'permit_status': 'permit_status'}
+
+    candidates = []  # (priority, position, raw header, standard column)
+    for position, header in enumerate(df.columns):
+        normalized = normalize_header(header)
+        if header in known:
+            priority, target = 0, known[header]
+        else:
+            priority, target = 1, names.get(normalized)
+        if target is None:
+            close = difflib.get_close_matches(normalized, list(names), n=1, cutoff=min_similarity)
+            priority, target = 2, names[close[0]] if close else None
+
+        # Entries of known were reviewed by hand and are kept as they are
+        if priority > 0:
+            role = infer_column_role(df[header])
+            has_values = df[header].replace('', pd.NA).notna().any()
+            if target in status_columns.values() and role in status_columns:
+                target = status_columns[role]
+            elif target is not None and 'date' in target and role != 'date' and has_values:
+                target = None
+            if target is None:
+                priority, target = 3, _target_from_role(role, normalized)
+
+        if target is not None:
+            candidates.append((priority, position, header, target))
+
+    mapping = {}
+    for _, _, header, target in sorted(candidates, key=lambda c: (c[0], c[1])):
+        if target not in mapping.values():
+            mapping[header] = target
+    return {header: mapping[header] for header in df.columns if header in mapping}
+
+def _target_from_role(role, normalized):
+    if role == 'inspection_status':
+        return 'inspt_status_1'
+    if role == 'permit_status':
+        return 'permit_status'
+    if role == 'date':
+        if 'insp' in normalized:
+            return 'inspt_date_1'
+        if 'issu' in normalized:
+            return 'permit_issuance_date'
+        if any(word in normalized for word in ('appl', 'submit', 'open', 'start', 'file', 'receiv')):
+            return 'permit_submission_date'
+    return None
+
+def load_files_aligned(file_paths, mapping_file='column_mapping.json', loader=None, provenance=False, learned_file=None):
+    """
+    Loads and concatenates CSV/XLSX files whose headers don't match, by renaming the columns
+    of each file to the standard names first. Files that have all the headers of the mapping in
+    mapping_file are renamed with it as is; the others are matched with infer_column_mapping().
+    Columns that can't be matched keep their raw name. Then drops empty and fully duplicated rows,
+    as load_files() does.
+
+    The learned mapping is saved in mapping_file (one per AHJ folder) and reused on the next run.
+    Entries edited by hand in that file take precedence over name matching.
+
+    Args:
+        file_paths (list of str): Paths to the files to be concatenated.
+        mapping_file (str): JSON file with the AHJ's raw header to standard column mapping.
+        loader (callable, optional): Function that reads one path into a DataFrame
+            (default: load_file_by_extension).
+        provenance (bool): Add the utils.provenance_columns (see load_files()).
+        learned_file (str, optional): Save the learned entries to this file for review instead of
+            adding them to mapping_file, which is then left untouched (used by the watcher).
+
+    Returns:
+        pd.DataFrame: Concatenated DataFrame with standard column names.
+    """
+    loader = loader or load_file_by_extension
+
+    if len(file_paths) == 0:
+        print("⚠️  No files provided.")
+        return pd.DataFrame()
+
+    known = {}
+    if os.path.exists(mapping_file):
+        with open(mapping_file) as f:
+            known = json.load(f)
+
+    reviewed = dict(known)
+    all_learned = {}
+    frames, sources = [], []
+    for file in file_paths:
+        try:
+            df = loader(file)
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+            continue
+
+        if reviewed and all(header in df.columns for header in reviewed):
+            # Same layout as the reviewed mapping: nothing to infer
+            mapping = {header: col for header, col in reviewed.items() if header in df.columns}
+        else:
+            mapping = infer_column_mapping(df, known)
+        learned = {header: col for header, col in mapping.items() if header not in known}
+        unmatched = [header for header in df.columns if header not in mapping]
+        print(f"📄 File '{file}' loaded with {len(df)} rows. Learned: {learned}")
+        if unmatched:
+            print(f"    Not matched (kept as is): {unmatched}")
+
+        known.update(learned)
+        all_learned.update(learned)
+        df = df.rename(columns=mapping)
+        frames.append(_add_sources(df, file, sources) if provenance else df)
+
+    if not frames:
+        return pd.DataFrame()
+
+    if learned_file is None:
+        with open(mapping_file, 'w') as f:
+            json.dump(known, f, indent=4)
+        saved_to = f"Column mapping saved to '{mapping_file}'."
+    elif all_learned:
+        with open(learned_file, 'w') as f:
+            json.dump(all_learned, f, indent=4)
+        saved_to = f"⚠️  Learned mappings saved to '{learned_file}' — Need to check them and add them to '{mapping_file}'!"
+    else:
+        saved_to = "No new headers."
+
+    concatenated_df = pd.concat(frames, ignore_index=True)
+    concatenated_df.dropna(how='all', subset=data_columns(concatenated_df), inplace=True)
+    cleaned_df = concatenated_df.drop_duplicates(subset=data_columns(concatenated_df))
+    cleaned_df = cleaned_df.replace('NULL', '')
+    cleaned_df = cleaned_df.replace('NA', '')
+    if provenance:
+        cleaned_df.attrs['source_files'] = sources
+        print(f"🔎 Provenance 'source_file' ids: {dict(enumerate(sources))}")
+
+    print(f"\n✅ Finished aligning {len(frames)} files. {saved_to}")
+    print(f"📉 Rows after deduplication: {len(cleaned_df)}")
+    return cleaned_df
@@ -0,0 +1,302 @@
+"""
+Mappings used to standardize the raw values, and the standard columns of the cleaned AHJs.
+Plain Python data, so importing it is instant.
+"""
+
+# MAPPINGS. Set always everything lowecase. 
+
+project_type_mapping = {
+    # PV
+    'photovoltaic system': 'PV',
+    'pv - roof mount': 'PV',
+    'pv': 'PV',
+    'pv ': 'PV',
+    
+    # PV+ST
+    'photovoltaic system with energy storage system': 'PV+ST',
+    'pv w/battery - roof mount': 'PV+ST',
+    'pv + storage': 'PV+ST',
+    'pv + storage ': 'PV+ST'
+}
+
+permit_status_mapping = {
+    # other
+    'cancelled': 'other',
+    'canceled': 'other',
+    # 'closed': 'other',
+    'closed - withdrawn': 'other',
+    'withdrawn': 'other',
+    'dead': 'other',
+    'claim filed': 'other',
+    'expired': 'other',
+    'fees due': 'other',
+    'plan approval expired': 'other',
+    'rejected': 'other',
+    'stop work order': 'other',
+    'needs resubmittal': 'other',
+    'stop work': 'other',
+
+    # finaled
+    'complete': 'finaled',
+    'reinstated': 'finaled',
+    'final - atmc': 'finaled',
+    'finaled': 'finaled',
+    'closed/final': 'finaled',
+    'approved': 'finaled',
+    'final': 'finaled',
+    'inspections complete': 'finaled',
+    'done': 'finaled',
+    'final inspection done':'finaled',
+    'closed': 'finaled',
+    'pln ck approved': 'finaled',
+    'administratively closed':'finaled',
+
+    # issued
+    'active': 'issued',
+    'issued': 'issued',
+    'issued - revision submitted': 'issued',
+    'inspection phase': 'issued',
+    'in review': 'issued',
+    'review': 'issued',
+    'open': 'issued',
+    'issued - revision pending': 'issued',
+    'issued (revision pending)':'issued',
+    'payment pending': 'issued',
+    'pend correction': 'issued',
+    'plan check': 'issued',
+    'other': 'issued',
+    'correction alert': 'issued',
+    'appointment req':'issued',
+    'inspections': 'issued',
+    'clearances required':'issued',
+
+    # before issuance (map to blank)
+    'void': '',
+    'additional info required': '',
+    'pending issuance': '',
+    'ready to issue': '',
+    'revision required': '',
+    'pending resubmittal': '',
+    'pending': '',
+    'unk': '',
+    'ready for issuance (revision)': '',
+    'submitted - online': '',
+    'applied': '',
+    'applied online': ''
+}
+
+inspection_status_mapping = {
+    # Passed
+    'approved': 'passed',
+    'apporved': 'passed',
+    'aproved': 'passed',
+    'passed': 'passed',
+    'pass': 'passed',
+    'approved w/ exception': 'passed',
+    'approved w/ service release': 'passed',
+    'pass - co not required': 'passed',
+    'not applicable': 'passed',
+    'approved for avista': 'passed',
+    
+    # Failed
+    'denied': 'failed',
+    'failed': 'failed',
+    'fail': 'failed',
+    'fal': 'failed',
+    're-inspection required': 'failed',
+    're-inspection required (with fee)': 'failed',
+    'partial approval': 'failed',
+    'denied/corrections': 'failed',
+    'refee due - denied/corrections': 'failed',
+    'partial': 'failed',
+    'correction notice': 'failed',
+    'correction notice issued': 'failed',
+    'incomplete': 'failed',
+    'corrections': 'failed',
+    'corrections required': 'failed',
+    'assess reinspection fee': 'failed',
+    'disapproved': 'failed',
+    'disapproved w/reinspection fee': 'failed',
+    'reinsp fee chrg': 'failed',
+    're-inpection': 'failed',    # typo included here
+    're-inspection': 'failed',
+    'reinspection': 'failed',
+    'plan revisions required': 'failed',
+    'fail - not ready': 'failed',           
+    'fail - corrections required': 'failed',
+    'fail - revision required': 'failed',   
+    'conditional': 'failed',                
+    'partial pass':'failed',
+    'not ready': 'failed',
+    'no access': 'failed',
+    
+    # Canceled
+    'cancelled': 'canceled',
+    'canceled': 'canceled',
+    'cancel': 'canceled',
+    'issued': 'canceled',
+    'inspection not required': 'canceled',
+    'cancelled - due to weather': 'canceled',    # added
+    'cancelled - see comments': 'canceled',      # added
+    'cancelled - contractor/owne': 'canceled',   # added
+    
+    # Empty (remove)
+    'pending': '',
+    'scheduled': '',
+    'note': '',
+    'incorrect inspection type': '',
+    'comment': '',
+    '2': ''
+}
+
+standard_columns = [
+    "solarAPP_or_traditional", "AHJ", "permit_ID", "solarAPP_ID", "address", 
+    "project_type", "permit_status", "permit_submission_date", "permit_issuance_date", 
+    "inspt_failed_once", "inspt_status_last", "inspt_date_last", "inspt_notes_last", 
+    "inspt_status_1", "inspt_date_1", "inspt_notes_1", "inspt_status_2", "inspt_date_2", "inspt_notes_2", 
+    "inspt_status_3", "inspt_date_3", "inspt_notes_3", "inspt_status_4", "inspt_date_4", "inspt_notes_4", 
+    "inspt_status_5", "inspt_date_5", "inspt_notes_5", "inspt_status_6", "inspt_date_6", "inspt_notes_6", 
+    "inspt_status_7", "inspt_date_7", "inspt_notes_7", "inspt_status_8", "inspt_date_8", "inspt_notes_8", 
+    "inspt_status_9", "inspt_date_9", "inspt_notes_9", "inspt_status_10", "inspt_date_10", "inspt_notes_10"
+]
+
+# Known raw headers, normalized with normalize_header(), for the columns load_files_aligned() can recognize.
+
+header_aliases = {
+    # permit_ID
+    'permit': 'permit_ID',
+    'permit_id': 'permit_ID',
+    'permit_no': 'permit_ID',
+    'permit_num': 'permit_ID',
+    'permit_number': 'permit_ID',
+    'record_id': 'permit_ID',
+    'record_number': 'permit_ID',
+    'case_number': 'permit_ID',
+
+    # solarAPP_ID
+    'solarapp': 'solarAPP_ID',
+    'solarapp_id': 'solarAPP_ID',
+    'solarapp_number': 'solarAPP_ID',
+    'solarapp_project_id': 'solarAPP_ID',
+
+    # address
+    'address': 'address',
+    'site_address': 'address',
+    'property_address': 'address',
+    'project_address': 'address',
+    'street_address': 'address',
+    'full_address': 'address',
+    'location': 'address',
+
+    # DESCRIPTION (used to infer project_type and solarAPP_or_traditional)
+    'description': 'DESCRIPTION',
+    'job_description': 'DESCRIPTION',
+    'work_description': 'DESCRIPTION',
+    'project_description': 'DESCRIPTION',
+    'scope_of_work': 'DESCRIPTION',
+
+    # project_type
+    'proj_type': 'project_type',
+    'project_type': 'project_type',
+    'work_type': 'project_type',
+
+    # permit_status
+    'status': 'permit_status',
+    'permit_status': 'permit_status',
+    'record_status': 'permit_status',
+    'current_status': 'permit_status',
+
+    # permit_submission_date
+    'started': 'permit_submission_date',
+    'applied': 'permit_submission_date',
+    'applied_date': 'permit_submission_date',
+    'date_applied': 'permit_submission_date',
+    'application_date': 'permit_submission_date',
+    'submitted': 'permit_submission_date',
+    'submitted_date': 'permit_submission_date',
+    'date_submitted': 'permit_submission_date',
+    'opened': 'permit_submission_date',
+    'open_date': 'permit_submission_date',
+
+    # permit_issuance_date
+    'issued': 'permit_issuance_date',
+    'issued_date': 'permit_issuance_date',
+    'issue_date': 'permit_issuance_date',
+    'date_issued': 'permit_issuance_date',
+
+    # inspt_status_1 (one inspection per row, merged later by Merge_Inspections)
+    'insp_result': 'inspt_status_1',
+    'insp_status': 'inspt_status_1',
+    'inspection_result': 'inspt_status_1',
+    'inspection_status': 'inspt_status_1',
+    'result': 'inspt_status_1',
+
+    # inspt_date_1
+    'insp_date': 'inspt_date_1',
+    'inspection_date': 'inspt_date_1',
+    'date_inspected': 'inspt_date_1',
+    'result_date': 'inspt_date_1',
+
+    # inspt_notes_1
+    'insp_notes': 'inspt_notes_1',
+    'insp_result_notes': 'inspt_notes_1',
+    'inspection_notes': 'inspt_notes_1',
+    'inspector_comments': 'inspt_notes_1',
+    'result_comments': 'inspt_notes_1',
+    'comments': 'inspt_notes_1',
+    'notes': 'inspt_notes_1'
+}
+
+# ADDRESSES. Words of an address replaced by normalize_address() (lowercase, punctuation removed).
+
+address_abbreviations = {
+    # Street suffixes
+    'street': 'st',
+    'avenue': 'ave',
+    'av': 'ave',
+    'road': 'rd',
+    'drive': 'dr',
+    'lane': 'ln',
+    'court': 'ct',
+    'boulevard': 'blvd',
+    'place': 'pl',
+    'circle': 'cir',
+    'parkway': 'pkwy',
+    'highway': 'hwy',
+    'terrace': 'ter',
+    'trail': 'trl',
+
+    # Directions
+    'north': 'n',
+    'south': 's',
+    'east': 'e',
+    'west': 'w',
+    'northeast': 'ne',
+    'northwest': 'nw',
+    'southeast': 'se',
+    'southwest': 'sw',
+
+    # Units
+    'apartment': 'unit',
+    'apt': 'unit',
+    'suite': 'unit',
+    'ste': 'unit'
+}
+
+# PROVENANCE
+# Optional columns (see load_files(provenance=True)) recording the raw file and row each row comes from,
+# and a bitmask of the rules below that changed it. Carried through every cleaning step.
+
+provenance_columns = ['source_file', 'source_row', 'rules_touched']
+
+provenance_rules = {
+    'solarAPP_or_traditional': 1 << 0,    # assign_solarAPP_or_traditional
+    'project_type': 1 << 1,               # assign_project_type
+    'inspection_status': 1 << 2,          # map_inspection_status
+    'last_inspection_fields': 1 << 3,     # assign_last_inspection_fields
+    'permit_status': 1 << 4,              # assign_permit_status (mapped or inferred)
+    'passed_by_finaled_permit': 1 << 5,   # assign_permit_status (inspt_status_last set to 'passed')
+    'inspt_failed_once': 1 << 6,          # add_inspt_failed_once_column
+    'merged_inspections': 1 << 7,         # Merge_Inspections (several rows collapsed into this one)
+    'merged_near_duplicates': 1 << 8      # merge_near_duplicates (empty cells filled from its near-duplicates)
+}
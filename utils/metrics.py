@@ -0,0 +1,225 @@
+"""
+Time-to-milestone metrics of the review: submission -> issuance -> first inspection -> final pass, and
+the number of inspections needed to pass, per permit and aggregated into cubes for the dashboards.
+"""
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+
+# MILESTONE METRICS
+# Computed over the whole inspection block at once: the inspt_date_1..10 and inspt_status_1..10 columns
+# become two (permits x 10) arrays, and each milestone is a reduction along the inspections. Dates are
+# parsed once per distinct value, as the same dates repeat across permits and columns.
+# Inspections are ordered by date, not by their column number (merged inspections aren't sorted).
+
+durations = {
+    'submission_to_issuance_days': ('submission_date', 'issuance_date'),
+    'issuance_to_first_inspection_days': ('issuance_date', 'first_inspection_date'),
+    'first_inspection_to_final_pass_days': ('first_inspection_date', 'final_pass_date'),
+    'submission_to_final_pass_days': ('submission_date', 'final_pass_date')
+}
+
+cube_dimensions = ['AHJ', 'solarAPP_or_traditional', 'project_type']
+
+# Part of the signature of the stored permit metrics: bump it when permit_metrics() changes, so
+# update_metrics() recomputes them
+METRICS_VERSION = 2
+
+
+def permit_metrics(df, n_inspections=10):
+    """
+    Milestone dates, durations and attempts of each permit of a cleaned DataFrame.
+
+    - first_inspection_date: earliest passed or failed inspection (canceled ones didn't take place).
+    - final_pass_date: latest passed inspection, when no inspection failed after it. Missing while the
+      permit hasn't passed (or the passing inspection has no date).
+    - attempts_to_pass: failed inspections before the final pass, plus one (1 = passed the first time,
+      as inspt_failed_once 'No'; earlier passed inspections such as a rough don't count).
+    - the durations in days (see durations). Negative ones are inconsistent dates and left missing.
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame (one AHJ or the merged dataset).
+        n_inspections (int): Number of inspection columns (inspt_date_1..n).
+
+    Returns:
+        pd.DataFrame: One row per permit with the cube dimensions, permit_ID, the milestone dates,
+        'inspections', 'attempts_to_pass' and the durations.
+    """
+    n = len(df)
+    empty = pd.Series('', index=df.index)
+    date_cols = [f'inspt_date_{i}' for i in range(1, n_inspections + 1)]
+    status_cols = [f'inspt_status_{i}' for i in range(1, n_inspections + 1)]
+
+    dates = _parse_dates(pd.DataFrame({col: df.get(col, empty) for col in date_cols}))
+    statuses = np.column_stack([
+        df.get(col, empty).fillna('').astype(str).str.strip().str.lower().to_numpy() for col in status_cols
+    ]) if n else np.empty((0, n_inspections), dtype=object)
+
+    dated = ~np.isnat(dates)
+    passed = (statuses == 'passed') & dated
+    failed = (statuses == 'failed') & dated
+    attempts = passed | failed
+
+    first_inspection = _reduce_dates(dates, attempts, np.min)
+    last_pass = _reduce_dates(dates, passed, np.max)
+    last_fail = _reduce_dates(dates, failed, np.max)
+    final_pass = np.where(np.isnat(last_fail) | (last_pass >= last_fail), last_pass, np.datetime64('NaT'))
+
+    failed_before_pass = failed & (dates <= final_pass[:, None])
+    attempts_to_pass = np.where(np.isnat(final_pass), np.nan, failed_before_pass.sum(axis=1) + 1)
+
+    result = pd.DataFrame({
+        col: df.get(col, empty).fillna('').astype(str).to_numpy() for col in cube_dimensions + ['permit_ID']
+    })
+    milestones = {
+        'submission_date': _parse_dates(df.get('permit_submission_date', empty).to_frame())[:, 0],
+        'issuance_date': _parse_dates(df.get('permit_issuance_date', empty).to_frame())[:, 0],
+        'first_inspection_date': first_inspection,
+        'final_pass_date': final_pass
+    }
+    for name, values in milestones.items():
+        result[name] = values
+    result['inspections'] = attempts.sum(axis=1)
+    result['attempts_to_pass'] = attempts_to_pass
+
+    inconsistent = 0
+    for name, (start, end) in durations.items():
+        days = (milestones[end] - milestones[start]) / np.timedelta64(1, 'D')
+        negative = days < 0
+        inconsistent += negative.sum()
+        result[name] = np.where(negative, np.nan, days)
+
+    print(f"✅ Milestone metrics computed for {n} permits.")
+    if inconsistent:
+        print(f"⚠️  {inconsistent} negative durations left empty — Need to check these dates!")
+    return result
+
+def metrics_cube(metrics, quantile=0.9):
+    """
+    Aggregates permit metrics by AHJ, solarAPP_or_traditional and project_type, and every rollup of
+    them ('ALL' in the dimensions that are rolled up, e.g. one row per AHJ, or the national totals).
+
+    Args:
+        metrics (pd.DataFrame): Result of permit_metrics().
+        quantile (float): Quantile reported with the median of each duration.
+
+    Returns:
+        pd.DataFrame: One row per group with 'permits', 'passed_share', 'first_time_pass_rate',
+        'attempts_to_pass_mean' and, per duration, its count, mean, median and quantile.
+    """
+    metrics = metrics.assign(
+        _passed=metrics['attempts_to_pass'].notna(),
+        _first_time=metrics['attempts_to_pass'] == 1
+    )
+    values = list(durations) + ['attempts_to_pass']
+
+    cubes = []
+    for mask in range(1 << len(cube_dimensions)):
+        dims = [dim for i, dim in enumerate(cube_dimensions) if mask & (1 << i)]
+        keyed = metrics.assign(**{dim: 'ALL' for dim in cube_dimensions if dim not in dims})
+        groups = keyed.groupby(cube_dimensions, sort=False, dropna=False)
+
+        stats = groups[values].agg(['count', 'mean', 'median'])
+        sums = groups[['_passed', '_first_time']].sum()
+        permits = groups.size()
+        cube = pd.DataFrame({
+            'permits': permits,
+            'passed_share': sums['_passed'] / permits,
+            'first_time_pass_rate': sums['_first_time'] / sums['_passed'].replace(0, np.nan),
+            'attempts_to_pass_mean': stats[('attempts_to_pass', 'mean')]
+        })
+        tail = groups[list(durations)].quantile(quantile)
+        for name in durations:
+            cube[f'{name}_count'] = stats[(name, 'count')]
+            cube[f'{name}_mean'] = stats[(name, 'mean')]
+            cube[f'{name}_median'] = stats[(name, 'median')]
+            cube[f'{name}_p{round(quantile * 100)}'] = tail[name]
+        cubes.append(cube.reset_index())
+
+    cube = pd.concat(cubes, ignore_index=True)
+    return cube.sort_values(cube_dimensions, kind='stable').reset_index(drop=True)
+
+def update_metrics(folder='clean', metrics_dir='metrics', output='metrics_cube.arrow'):
+    """
+    Incremental metrics of all the cleaned AHJs: the permit metrics of an AHJ are only recomputed when
+    its '<AHJ>.arrow' file changed (content hash), and are kept in metrics_dir. The cube is then rebuilt
+    from the stored permit metrics and saved as an Arrow file for the dashboards.
+
+    Args:
+        folder (str): Folder with the '<AHJ>.arrow' files (see publish_arrow()).
+        metrics_dir (str): Folder for the permit metrics of each AHJ and their hashes.
+        output (str): Path of the cube (Arrow IPC file). None to only return it.
+
+    Returns:
+        pd.DataFrame: The cube (see metrics_cube()).
+    """
+    import pyarrow as pa
+
+    os.makedirs(metrics_dir, exist_ok=True)
+    index_path = os.path.join(metrics_dir, 'index.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    files = sorted(file for file in os.listdir(folder) if file.endswith('.arrow'))
+    updated = 0
+    for file in files:
+        path = os.path.join(folder, file)
+        signature = f'{METRICS_VERSION}-{_file_hash(path)}'
+        metrics_path = os.path.join(metrics_dir, file.replace('.arrow', '.pkl'))
+        if index.get(file) == signature and os.path.exists(metrics_path):
+            continue
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        needed = [col for col in table.column_names if col.startswith(('inspt_date_', 'inspt_status_'))
+                  or col in cube_dimensions + ['permit_ID', 'permit_submission_date', 'permit_issuance_date']]
+        permit_metrics(table.select(needed).to_pandas()).to_pickle(metrics_path)
+        index[file] = signature
+        updated += 1
+
+    for file in set(index) - set(files):
+        os.remove(os.path.join(metrics_dir, file.replace('.arrow', '.pkl')))
+        del index[file]
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    print(f"🔁 Metrics updated for {updated} of {len(files)} AHJs.")
+
+    metrics = [pd.read_pickle(os.path.join(metrics_dir, file.replace('.arrow', '.pkl'))) for file in files]
+    cube = metrics_cube(pd.concat(metrics, ignore_index=True)) if metrics else pd.DataFrame()
+    if output is not None and not cube.empty:
+        table = pa.Table.from_pandas(cube, preserve_index=False)
+        with pa.OSFile(output, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        print(f"📁 Metrics cube with {len(cube)} rows saved to '{output}'.")
+    return cube
+
+def _parse_dates(block):
+    """
+    Parses a DataFrame of date columns into a 2D datetime64 array, parsing each distinct value once.
+    """
+    values = block.to_numpy(dtype=object).ravel()
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object).astype(str), errors='coerce', format='mixed').to_numpy()
+    dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    dates[codes >= 0] = parsed[codes[codes >= 0]]
+    return dates.reshape(block.shape)
+
+def _reduce_dates(dates, mask, reduce):
+    """
+    Min or max date of each row over the masked cells (NaT when none).
+    """
+    if dates.shape[1] == 0:
+        return np.full(len(dates), np.datetime64('NaT'), dtype='datetime64[ns]')
+    ints = dates.view('int64')
+    fill = np.iinfo(np.int64).max if reduce is np.min else np.iinfo(np.int64).min
+    reduced = reduce(np.where(mask, ints, fill), axis=1)
+    return np.where(mask.any(axis=1), reduced, np.datetime64('NaT').astype('datetime64[ns]').view('int64')).view('datetime64[ns]')
+
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
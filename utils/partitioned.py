@@ -0,0 +1,350 @@
+"""
+Partitioned execution of the cleaning steps: in parallel, or out-of-core for AHJs that don't fit in memory.
+"""
+import pandas as pd
+import numpy as np
+import os
+import io
+import shutil
+import tempfile
+import warnings
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .steps import add_inspt_failed_once_column, clean_dataframe, filter, assign_AHJ, assign_last_inspection_fields, assign_permit_status, assign_project_type, assign_solarAPP_or_traditional, Do_Merge_Inspections, map_inspection_status, standardize_format
+from .files import load_file_by_extension
+from .mappings import standard_columns
+
+# OUT-OF-CORE EXECUTION
+# For AHJs that don't fit in memory. The raw files are spilled to disk one at a time, hash partitioned
+# by permit_ID (so every row of a permit lands in the same partition) and each partition is cleaned
+# on its own, in parallel. Decisions that the steps take over the whole DataFrame (e.g. whether
+# there are duplicate permits to merge) are computed across all partitions and passed to every one.
+
+def clean_out_of_core(file_paths, column_mapping=None, spill_dir='spill', memory_budget_mb=2048, max_workers=None, keep_spill=False,
+                      filters=None):
+    """
+    Out-of-core version of load_files() + filter cell + renaming + clean_dataframe().
+    The output is the same as the in-memory path, but only one raw file and one partition
+    per worker are held in memory at a time.
+
+    Args:
+        file_paths (list of str): Paths to the raw files (as returned by get_file_list()).
+        column_mapping (dict, optional): Raw to standard column names, as in the notebook's rename cell.
+        spill_dir (str): Folder for the intermediate files. Deleted at the end unless keep_spill is True.
+        memory_budget_mb (int): Total memory the partitions may use at once, across all workers.
+        max_workers (int, optional): Number of worker processes (default: number of CPUs). Use 1 to run in this process.
+        keep_spill (bool): Keep the intermediate files for debugging.
+        filters (list of dict, optional): The notebook's filter cell, applied to each file before it is
+            partitioned: utils.filter() for each entry, e.g. [{"column": "Inspection Type",
+            "values_to_keep": ["Solar Final", "Solar Rough"]}] (same as the watcher's filter.json).
+
+    Returns:
+        pd.DataFrame: Cleaned DataFrame, ready for final_save().
+    """
+    if len(file_paths) == 0:
+        print("⚠️  No files provided.")
+        return pd.DataFrame()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    os.makedirs(spill_dir, exist_ok=True)
+
+    try:
+        runs, multi_file = _spill_raw_files(file_paths, spill_dir, column_mapping, filters)
+        if not runs:
+            return pd.DataFrame()
+
+        partitions, flags = _partition_runs(runs, spill_dir, multi_file, memory_budget_mb, max_workers)
+        print(f"🗂️  Spilled {len(runs)} files into {len(partitions)} partitions by permit_ID.")
+
+        # Steps up to the inspection merge, then the merge itself once the whole AHJ is known
+        results = _map_partitions(_clean_partition, [(part, multi_file, flags) for part in partitions], max_workers)
+        flags['has_duplicates'] = any(r['has_duplicates'] for r in results)
+        flags['has_inspections'] = any(r['has_inspections'] for r in results)
+        merged = _map_partitions(_merge_partition, [(part, flags) for part in partitions], max_workers)
+    finally:
+        if not keep_spill:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    df = _stitch_partitions(merged, flags)
+    print(f"✅ Out-of-core cleaning finished with {len(df)} rows.")
+    return df
+
+def _spill_raw_files(file_paths, spill_dir, column_mapping, filters=None):
+    """
+    Loads the raw files one at a time, with the same header checks as load_files(),
+    filters them and writes each one to spill_dir as a run. Rows are indexed by their position in the
+    concatenated load so the original order can be restored at the end.
+    """
+    multi_file = len(file_paths) > 1
+    runs = []
+    base_columns = None
+    offset = 0
+
+    for file in file_paths:
+        try:
+            df = load_file_by_extension(file)
+        except Exception as e:
+            print(f"❌ Error reading {file}: {e}")
+            continue
+
+        if base_columns is None:
+            base_columns = list(df.columns)
+        elif list(df.columns) != base_columns:
+            print(f"⚠️  Header mismatch in file: {file}")
+            print(f"    Expected: {base_columns}")
+            print(f"    Found:    {list(df.columns)}")
+            continue
+
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        if multi_file:
+            df = df.dropna(how='all')
+        for spec in filters or []:
+            df = filter(df, spec['column'], spec['values_to_keep'])
+        if column_mapping:
+            df = df.rename(columns=column_mapping)
+
+        run = os.path.join(spill_dir, f'run_{len(runs):05d}.pkl')
+        df.to_pickle(run)
+        runs.append({'path': run, 'sample': _dtype_sample(df), 'bytes': df.memory_usage(deep=True).sum()})
+        print(f"📄 File '{file}' spilled with {len(df)} rows.")
+
+    return runs, multi_file
+
+def _dtype_sample(df):
+    """
+    One row with the first non-null value of each column (null where the whole column is), so
+    pd.concat of the samples picks the same dtypes as pd.concat of the whole runs: all-NA columns
+    (e.g. an empty 'Issued' date column in a file of pending permits) don't widen the others.
+    """
+    if df.empty:
+        return df.iloc[:0]
+    return pd.DataFrame({
+        col: df[col].iloc[[int(df[col].notna().to_numpy().argmax())]].reset_index(drop=True)
+        for col in df.columns
+    })
+
+def _partition_runs(runs, spill_dir, multi_file, memory_budget_mb, max_workers):
+    """
+    Splits every run by a hash of permit_ID into partition folders, and computes the
+    whole-AHJ flags the cleaning steps need before they run.
+    Returns the partition folders and the flags.
+    """
+    # Columns are widened to the dtypes pd.concat would give over all files, so every partition
+    # holds the same values as the in-memory DataFrame. Worked out on the one-row samples recorded
+    # when spilling, so no run is read twice.
+    with warnings.catch_warnings():
+        # Same (deprecated) all-NA handling as the concat in load_files(), on purpose
+        warnings.simplefilter('ignore', FutureWarning)
+        dtypes = pd.concat([run['sample'] for run in runs]).dtypes
+
+    # The steps expand the raw columns to the standard ones and copy the frame a few times
+    n_columns = max(len(dtypes), 1)
+    expansion = max(1.0, len(standard_columns) / n_columns) * 3
+    total_bytes = sum(run['bytes'] for run in runs) * expansion
+    budget_per_worker = memory_budget_mb * 1024 ** 2 / max_workers
+    n_partitions = max(max_workers, int(np.ceil(total_bytes / budget_per_worker)))
+
+    partitions = [os.path.join(spill_dir, f'part_{p:04d}') for p in range(n_partitions)]
+    for part in partitions:
+        os.makedirs(part, exist_ok=True)
+
+    flags = {'solarAPP_provided': False, 'solarAPP_IDs_available': False, 'permit_status_provided': False}
+
+    for k, run in enumerate(runs):
+        df = pd.read_pickle(run['path'])
+        df = df.astype({col: dtype for col, dtype in dtypes.items() if df[col].dtype != dtype})
+
+        for name, value in _frame_flags(df, multi_file).items():
+            flags[name] = flags[name] or value
+
+        keys = df['permit_ID'].astype(str).str.strip()
+        part_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions
+        for p in np.unique(part_ids):
+            df[part_ids == p].to_pickle(os.path.join(partitions[p], f'run_{k:05d}.pkl'))
+        os.remove(run['path'])
+
+    return partitions, flags
+
+def _frame_flags(df, multi_file):
+    """
+    Whole-AHJ decisions taken by assign_solarAPP_or_traditional() and assign_permit_status(),
+    computed on one slice of the loaded data (the result for the AHJ is the OR over all slices).
+    """
+    def values(col):
+        series = df[col]
+        if multi_file:
+            # load_files() replaces these after the deduplication
+            series = series.replace('NULL', '').replace('NA', '')
+        return series
+
+    flags = {'solarAPP_provided': False, 'solarAPP_IDs_available': False, 'permit_status_provided': False}
+    if 'solarAPP_or_traditional' in df.columns:
+        existing = values('solarAPP_or_traditional').astype(str).str.strip().replace('nan', '')
+        flags['solarAPP_provided'] = bool((existing != '').any())
+    if 'solarAPP_ID' in df.columns:
+        cleaned_ids = values('solarAPP_ID').astype(str).str.strip()
+        flags['solarAPP_IDs_available'] = bool(((cleaned_ids != '') & (cleaned_ids.str.lower() != 'nan')).any())
+    if 'permit_status' in df.columns:
+        flags['permit_status_provided'] = bool(values('permit_status').replace('', pd.NA).notna().any())
+    return flags
+
+def _clean_partition(part, multi_file, flags):
+    """
+    Worker: deduplicates one partition like load_files() and runs the cleaning steps up to
+    the inspection merge. Returns the flags Do_Merge_Inspections() needs.
+    """
+    runs = sorted(os.listdir(part))
+    if not runs:
+        return {'has_duplicates': False, 'has_inspections': False}
+
+    df = pd.concat([pd.read_pickle(os.path.join(part, run)) for run in runs])
+    df = df.drop_duplicates()
+    if multi_file:
+        df = df.replace('NULL', '').replace('NA', '')
+
+    df, merge_flags = _clean_steps(df, flags)
+
+    for run in runs:
+        os.remove(os.path.join(part, run))
+    df.to_pickle(os.path.join(part, 'cleaned.pkl'))
+    return merge_flags
+
+def _merge_partition(part, flags):
+    """
+    Worker: runs Do_Merge_Inspections() on one cleaned partition (see _merge_steps()).
+    """
+    path = os.path.join(part, 'cleaned.pkl')
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return _merge_steps(pd.read_pickle(path), flags)
+
+def _clean_steps(df, flags):
+    """
+    Runs the cleaning steps up to the inspection merge on one partition, with the whole-AHJ flags.
+    Returns the cleaned partition and the flags Do_Merge_Inspections() needs.
+    """
+    df = assign_solarAPP_or_traditional(df, flags['solarAPP_provided'], flags['solarAPP_IDs_available'])
+    df = assign_AHJ(df)
+    df = assign_project_type(df)
+    df = map_inspection_status(df)
+    df = assign_last_inspection_fields(df)
+    df = standardize_format(df)
+    df = assign_permit_status(df, flags['permit_status_provided'])
+    df = add_inspt_failed_once_column(df)
+
+    return df, {
+        'has_duplicates': bool(df['permit_ID'].duplicated().any()),
+        'has_inspections': bool(df[['inspt_status_last', 'inspt_date_last', 'inspt_notes_last']].notna().any(axis=1).any()),
+    }
+
+def _merge_steps(df, flags):
+    """
+    Runs Do_Merge_Inspections() on one cleaned partition. The returned DataFrame is indexed by
+    the position of each row (or of the first row of each permit, when merging) in the whole
+    DataFrame, so partitions can be stitched back in order with _stitch_partitions().
+    """
+    merging = flags['has_duplicates'] and flags['has_inspections']
+    if merging:
+        first_row = pd.Series(df.index, index=df['permit_ID']).groupby(level=0).min()
+
+    df = Do_Merge_Inspections(df, flags['has_duplicates'], flags['has_inspections'])
+    if merging:
+        df.index = df['permit_ID'].map(first_row).to_numpy()
+    return df
+
+def _stitch_partitions(parts, flags):
+    """
+    Concatenates the merged partitions in the order the in-memory path produces.
+    """
+    df = pd.concat([part for part in parts if len(part.columns)]).sort_index(kind='stable')
+    if flags['has_duplicates'] and flags['has_inspections']:
+        df = df.reset_index(drop=True)
+    return df
+
+# PARALLEL EXECUTION
+# Same partitioning as the out-of-core mode, for a DataFrame already loaded in memory: the rows of
+# each permit go to the same partition and every partition runs the cleaning steps in its own process.
+# The partitions are spilled once and stay on disk between the two phases, so only the merge flags
+# travel back to this process until the merged partitions are stitched.
+
+def clean_parallel(df, max_workers=None, n_partitions=None, spill_dir=None):
+    """
+    Parallel version of clean_dataframe(), with the same output.
+    The DataFrame is hash partitioned by permit_ID and the partitions are cleaned in a process pool,
+    then stitched back together in the original order.
+
+    Args:
+        df (pd.DataFrame): Loaded DataFrame with the columns already renamed to the standard names.
+        max_workers (int, optional): Number of worker processes (default: number of CPUs). Use 1 to run in this process.
+        n_partitions (int, optional): Number of partitions (default: 4 per worker, to balance the load).
+        spill_dir (str, optional): Folder where the partitions are kept between the phases, in a
+            temporary subfolder deleted at the end (default: the system's temporary folder).
+
+    Returns:
+        pd.DataFrame: Cleaned DataFrame, ready for final_save().
+    """
+    if df.empty:
+        return clean_dataframe(df)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    n_partitions = n_partitions or max_workers * 4
+
+    # Partitions are stitched back by position, the original row labels are restored at the end
+    labels = df.index
+    df = df.set_axis(pd.RangeIndex(len(df)))
+
+    flags = _frame_flags(df, multi_file=False)
+    keys = df['permit_ID'].astype(str).str.strip()
+    part_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions
+    if spill_dir:
+        os.makedirs(spill_dir, exist_ok=True)
+    spill_dir = tempfile.mkdtemp(prefix='clean_parallel_', dir=spill_dir)
+    try:
+        partitions = []
+        for p, part in df.groupby(part_ids, sort=True):
+            partitions.append(os.path.join(spill_dir, f'part_{p:04d}'))
+            os.makedirs(partitions[-1], exist_ok=True)
+            part.to_pickle(os.path.join(partitions[-1], 'partition.pkl'))
+        print(f"🗂️  Cleaning {len(df)} rows in {len(partitions)} partitions by permit_ID with {max_workers} workers.")
+
+        results = _map_partitions(_clean_spilled_partition, [(part, flags) for part in partitions], max_workers)
+        flags['has_duplicates'] = any(r['has_duplicates'] for r in results)
+        flags['has_inspections'] = any(r['has_inspections'] for r in results)
+        merged = _map_partitions(_merge_partition, [(part, flags) for part in partitions], max_workers)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    df = _stitch_partitions(merged, flags)
+    if not (flags['has_duplicates'] and flags['has_inspections']):
+        df.index = labels[df.index]
+    print(f"✅ Parallel cleaning finished with {len(df)} rows.")
+    return df
+
+def _clean_spilled_partition(part, flags):
+    """
+    Worker: runs the cleaning steps up to the inspection merge on one partition of clean_parallel()
+    and leaves it in the partition folder for _merge_partition(). Returns only the merge flags.
+    """
+    path = os.path.join(part, 'partition.pkl')
+    df, merge_flags = _clean_steps(pd.read_pickle(path), flags)
+    os.remove(path)
+    df.to_pickle(os.path.join(part, 'cleaned.pkl'))
+    return merge_flags
+
+def _map_partitions(func, args_list, max_workers):
+    """
+    Runs func over the partitions in a process pool (or in this process when max_workers is 1),
+    keeping the steps' per-partition messages out of the notebook output.
+    """
+    if max_workers == 1:
+        return [_quiet_call(func, *args) for args in args_list]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_quiet_call, func, *args) for args in args_list]
+        return [future.result() for future in futures]
+
+def _quiet_call(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
@@ -0,0 +1,247 @@
+"""
+Data-quality profile of the cleaned AHJ outputs, computed in a single pass.
+
+The data is read in batches (from the memory-mapped '<AHJ>.arrow' files, see utils.open_clean_arrow())
+and every per-column statistic is updated from each batch: null and empty counts, approximate distinct
+counts (HyperLogLog), top values, date ranges and status values that are not standardized.
+The result is saved as JSON so reports from different dates can be compared with compare_profiles().
+"""
+import json
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .arrow import open_clean_arrow
+from .mappings import inspection_status_mapping, permit_status_mapping
+
+REPORT_VERSION = 1
+
+# Values the cleaning steps standardize the status columns to
+standard_permit_statuses = set(permit_status_mapping.values())
+standard_inspection_statuses = set(inspection_status_mapping.values())
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with 2**precision registers (standard error ~1.04 / sqrt(2**precision),
+    0.8% for the default). Values are hashed as strings, so 1 and '1' count as the same value.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Adds the values of a Series (nulls must be dropped before).
+        """
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(values.astype(str).to_numpy(dtype=object), categorize=False)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+
+        # Position of the first 1 bit in the remaining bits (bits + 1 when they are all 0)
+        rank = np.full(len(rest), bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = bits - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # small range correction (linear counting)
+        return int(round(estimate))
+
+
+class ColumnProfile:
+    """
+    Running statistics of one column.
+
+    Args:
+        name (str): Column name.
+        top_k (int): Number of most frequent values to report.
+        capacity (int): Distinct values tracked for the top values. Above it, the least frequent ones
+            are dropped after each batch, so the top values of very diverse columns are approximate.
+    """
+
+    def __init__(self, name, top_k=10, capacity=10000):
+        self.name = name
+        self.top_k = top_k
+        self.capacity = capacity
+        self.rows = 0
+        self.nulls = 0
+        self.empty = 0
+        self.distinct = HyperLogLog()
+        self.counts = Counter()
+
+        self.is_date = 'date' in name.lower()
+        self.date_min = None
+        self.date_max = None
+        self.unparseable_dates = 0
+
+        self.standard_statuses = None
+        if name == 'permit_status':
+            self.standard_statuses = standard_permit_statuses
+        elif name.startswith('inspt_status_'):
+            self.standard_statuses = standard_inspection_statuses
+        self.unmapped = Counter()
+
+    def update(self, series):
+        self.rows += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        as_text = values.astype(str)
+        filled = values[as_text.str.strip() != '']
+        self.empty += len(values) - len(filled)
+        if filled.empty:
+            return
+
+        self.distinct.update(filled)
+        self.counts.update(filled.astype(str).value_counts().to_dict())
+        if len(self.counts) > self.capacity:
+            self.counts = Counter(dict(self.counts.most_common(self.capacity)))
+
+        if self.is_date:
+            self._update_dates(filled)
+        if self.standard_statuses is not None:
+            unmapped = filled[~filled.isin(self.standard_statuses)]
+            self.unmapped.update(unmapped.astype(str).value_counts().to_dict())
+
+    def _update_dates(self, values):
+        dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        retry = dates.isna()
+        if retry.any():
+            dates[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+        valid = dates.dropna()
+        self.unparseable_dates += len(dates) - len(valid)
+        if valid.empty:
+            return
+        low, high = valid.min(), valid.max()
+        self.date_min = low if self.date_min is None else min(self.date_min, low)
+        self.date_max = high if self.date_max is None else max(self.date_max, high)
+
+    def report(self):
+        report = {
+            'rows': self.rows,
+            'nulls': self.nulls,
+            'empty': self.empty,
+            'filled_ratio': round((self.rows - self.nulls - self.empty) / self.rows, 4) if self.rows else 0.0,
+            'distinct_approx': self.distinct.count(),
+            'top': [[value, count] for value, count in self.counts.most_common(self.top_k)],
+        }
+        if self.is_date:
+            report['date_min'] = self.date_min.strftime('%Y-%m-%d') if self.date_min is not None else None
+            report['date_max'] = self.date_max.strftime('%Y-%m-%d') if self.date_max is not None else None
+            report['unparseable_dates'] = self.unparseable_dates
+        if self.standard_statuses is not None:
+            report['unmapped'] = dict(self.unmapped.most_common())
+        return report
+
+
+def profile_batches(batches, top_k=10):
+    """
+    Profiles a stream of DataFrames (all with the same columns) in one pass.
+
+    Args:
+        batches (iterable of (str or dict, pd.DataFrame)): Source name of the batch, or the rows of
+            each source in it (e.g. df['AHJ'].value_counts()), and the batch of rows.
+        top_k (int): Number of most frequent values reported per column.
+
+    Returns:
+        dict: The profile report (see profile_clean_folder()).
+    """
+    columns = {}
+    sources = Counter()
+    for source, batch in batches:
+        if isinstance(source, str):
+            sources[source] += len(batch)
+        else:
+            sources.update({str(name): int(rows) for name, rows in source.items()})
+        for col in batch.columns:
+            if col not in columns:
+                columns[col] = ColumnProfile(col, top_k=top_k)
+            columns[col].update(batch[col])
+
+    return {
+        'version': REPORT_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'rows': sum(sources.values()),
+        'sources': dict(sources),
+        'columns': {col: profile.report() for col, profile in columns.items()},
+    }
+
+def profile_clean_folder(folder='clean', output='profile_report.json', batch_rows=100_000, top_k=10):
+    """
+    Profiles all the cleaned AHJ Arrow files in a folder and saves the report as JSON.
+
+    The report has the total rows, the rows per AHJ ('sources') and, for each column: rows, nulls,
+    empty strings, filled ratio, approximate distinct count, top values, the date range and the
+    unparseable dates of date columns, and the non-standard values of status columns ('unmapped').
+
+    Args:
+        folder (str): Folder with the '<AHJ>.arrow' files.
+        output (str): Path of the JSON report.
+        batch_rows (int): Rows converted to pandas at a time.
+        top_k (int): Number of most frequent values reported per column.
+
+    Returns:
+        dict: The profile report.
+    """
+    table = open_clean_arrow(folder)
+
+    def batches():
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            df = batch.to_pandas()
+            yield df['AHJ'].value_counts(sort=False, dropna=False), df
+
+    report = profile_batches(batches(), top_k=top_k)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"📋 Profiled {report['rows']} rows from {len(report['sources'])} AHJs. Report saved to '{output}'.")
+    return report
+
+def compare_profiles(old, new, min_change=0.01):
+    """
+    Compares two profile reports (dicts or JSON paths), e.g. from consecutive runs.
+
+    Args:
+        old, new (dict or str): Reports or paths to the JSON reports.
+        min_change (float): Smallest change of filled ratio to report.
+
+    Returns:
+        pd.DataFrame: One row per changed column with the old and new filled ratio, distinct count
+        and number of unmapped status values.
+    """
+    if isinstance(old, str):
+        with open(old) as f:
+            old = json.load(f)
+    if isinstance(new, str):
+        with open(new) as f:
+            new = json.load(f)
+
+    rows = []
+    for col in sorted(set(old['columns']) | set(new['columns'])):
+        before = old['columns'].get(col, {})
+        after = new['columns'].get(col, {})
+        row = {
+            'column': col,
+            'filled_ratio_old': before.get('filled_ratio'),
+            'filled_ratio_new': after.get('filled_ratio'),
+            'distinct_old': before.get('distinct_approx'),
+            'distinct_new': after.get('distinct_approx'),
+            'unmapped_old': sum(before.get('unmapped', {}).values()),
+            'unmapped_new': sum(after.get('unmapped', {}).values()),
+        }
+        ratio_change = abs((row['filled_ratio_new'] or 0) - (row['filled_ratio_old'] or 0))
+        if not before or not after or ratio_change >= min_change or row['unmapped_old'] != row['unmapped_new']:
+            rows.append(row)
+
+    print(f"🔍 Rows: {old['rows']} → {new['rows']}. {len(rows)} columns changed.")
+    return pd.DataFrame(rows)
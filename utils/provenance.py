@@ -0,0 +1,89 @@
+"""
+Row-level provenance carried through the cleaning steps (see load_files(provenance=True)).
+"""
+import pandas as pd
+import numpy as np
+
+from .mappings import provenance_columns, provenance_rules
+
+# PROVENANCE HELPERS
+
+def add_provenance(df, file_id):
+    """
+    Adds the provenance columns to a freshly loaded raw file:
+    - 'source_file' (int16): id of the source, its position in df.attrs['source_files'] after
+      load_files(). A source is a raw file, or one sheet of it when several sheets of an Excel file
+      were stacked (they get the ids file_id, file_id + 1, ... in sheet order).
+    - 'source_row' (int32): position of the row in its file or sheet (Excel row = source_row + 2).
+    - 'rules_touched' (uint32): bitmask of utils.provenance_rules, filled by the cleaning steps.
+    After Merge_Inspections, 'inspt_source_1'..'inspt_source_8' hold the source of each inspection,
+    packed as source_file * 2**32 + source_row.
+    """
+    lengths = [rows for _, rows in df.attrs.get('sheets', [])]
+    if len(lengths) > 1 and sum(lengths) == len(df):
+        df['source_file'] = np.repeat(np.arange(file_id, file_id + len(lengths)), lengths).astype('int16')
+        df['source_row'] = np.concatenate([np.arange(rows) for rows in lengths]).astype('int32')
+    else:
+        df['source_file'] = np.full(len(df), file_id, dtype='int16')
+        df['source_row'] = np.arange(len(df), dtype='int32')
+    df['rules_touched'] = np.zeros(len(df), dtype='uint32')
+    return df
+
+def _add_sources(df, file, sources):
+    """
+    Adds the provenance columns to a raw file loaded by load_files() and appends its sources
+    ('<file>' or '<file>#<sheet>' for each stacked sheet) to the sources list, whose positions
+    are the 'source_file' ids.
+    """
+    df = add_provenance(df, len(sources))
+    sheets = df.attrs.pop('sheets', [])
+    if len(sheets) > 1:
+        sources.extend(f'{file}#{sheet}' for sheet, _ in sheets)
+    else:
+        sources.append(file)
+    return df
+
+def is_provenance_column(col):
+    return col in provenance_columns or str(col).startswith('inspt_source_')
+
+def data_columns(df):
+    """
+    Columns of df that are not provenance columns (used for deduplication).
+    """
+    return [col for col in df.columns if not is_provenance_column(col)]
+
+def mark_rule(df, rule, mask):
+    """
+    Sets the bit of a rule (see utils.provenance_rules) in 'rules_touched' for the rows in mask.
+    Does nothing when the DataFrame has no provenance columns.
+    """
+    if 'rules_touched' not in df.columns:
+        return
+    bit = provenance_rules[rule]
+    df['rules_touched'] = df['rules_touched'] | np.where(mask, bit, 0).astype('uint32')
+
+def describe_rules(rules_touched):
+    """
+    Names of the rules set in a 'rules_touched' value, e.g. describe_rules(df.loc[5, 'rules_touched']).
+    """
+    return [rule for rule, bit in provenance_rules.items() if int(rules_touched) & bit]
+
+def _changed(original, new):
+    """
+    True where a column value was changed by a step (two missing values count as equal).
+    """
+    return ~((original == new) | (original.isna() & new.isna()))
+
+def _merge_rules(df):
+    """
+    'rules_touched' of each permit after Merge_Inspections: the OR over all its rows,
+    plus 'merged_inspections' when it had several rows.
+    """
+    permits = df['permit_ID']
+    combined = pd.Series(0, index=pd.Index(permits.unique()), dtype='uint32')
+    for bit in provenance_rules.values():
+        has_bit = (df['rules_touched'] & bit).ne(0).groupby(permits, sort=False).any()
+        combined |= np.where(has_bit.reindex(combined.index), bit, 0).astype('uint32')
+    several = permits.value_counts().reindex(combined.index) > 1
+    combined |= np.where(several, provenance_rules['merged_inspections'], 0).astype('uint32')
+    return combined
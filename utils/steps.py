@@ -1,167 +1,13 @@
+"""
+The cleaning steps run by the cleanser notebook, in the order of clean_dataframe().
+"""
 import pandas as pd
-import os
 import numpy as np
-import warnings
-warnings.simplefilter(action='ignore', category=pd.errors.SettingWithCopyWarning)
-
-# MAPPINGS. Set always everything lowecase. 
+import os
 
-project_type_mapping = {
-    # PV
-    'photovoltaic system': 'PV',
-    'pv - roof mount': 'PV',
-    'pv': 'PV',
-    'pv ': 'PV',
-    
-    # PV+ST
-    'photovoltaic system with energy storage system': 'PV+ST',
-    'pv w/battery - roof mount': 'PV+ST',
-    'pv + storage': 'PV+ST',
-    'pv + storage ': 'PV+ST'
-}
- 
-permit_status_mapping = {
-    # other
-    'cancelled': 'other',
-    'canceled': 'other',
-    # 'closed': 'other',
-    'closed - withdrawn': 'other',
-    'withdrawn': 'other',
-    'dead': 'other',
-    'claim filed': 'other',
-    'expired': 'other',
-    'fees due': 'other',
-    'plan approval expired': 'other',
-    'rejected': 'other',
-    'stop work order': 'other',
-    'needs resubmittal': 'other',
-    'stop work': 'other',
-
-    # finaled
-    'complete': 'finaled',
-    'reinstated': 'finaled',
-    'final - atmc': 'finaled',
-    'finaled': 'finaled',
-    'closed/final': 'finaled',
-    'approved': 'finaled',
-    'final': 'finaled',
-    'inspections complete': 'finaled',
-    'done': 'finaled',
-    'final inspection done':'finaled',
-    'closed': 'finaled',
-    'pln ck approved': 'finaled',
-    'administratively closed':'finaled',
-
-    # issued
-    'active': 'issued',
-    'issued': 'issued',
-    'issued - revision submitted': 'issued',
-    'inspection phase': 'issued',
-    'in review': 'issued',
-    'review': 'issued',
-    'open': 'issued',
-    'issued - revision pending': 'issued',
-    'issued (revision pending)':'issued',
-    'payment pending': 'issued',
-    'pend correction': 'issued',
-    'plan check': 'issued',
-    'other': 'issued',
-    'correction alert': 'issued',
-    'appointment req':'issued',
-    'inspections': 'issued',
-    'clearances required':'issued',
-
-    # before issuance (map to blank)
-    'void': '',
-    'additional info required': '',
-    'pending issuance': '',
-    'ready to issue': '',
-    'revision required': '',
-    'pending resubmittal': '',
-    'pending': '',
-    'unk': '',
-    'ready for issuance (revision)': '',
-    'submitted - online': '',
-    'applied': '',
-    'applied online': ''
-}
-
-inspection_status_mapping = {
-    # Passed
-    'approved': 'passed',
-    'apporved': 'passed',
-    'aproved': 'passed',
-    'passed': 'passed',
-    'pass': 'passed',
-    'approved w/ exception': 'passed',
-    'approved w/ service release': 'passed',
-    'pass - co not required': 'passed',
-    'not applicable': 'passed',
-    'approved for avista': 'passed',
-    
-    # Failed
-    'denied': 'failed',
-    'failed': 'failed',
-    'fail': 'failed',
-    'fal': 'failed',
-    're-inspection required': 'failed',
-    're-inspection required (with fee)': 'failed',
-    'partial approval': 'failed',
-    'denied/corrections': 'failed',
-    'refee due - denied/corrections': 'failed',
-    'partial': 'failed',
-    'correction notice': 'failed',
-    'correction notice issued': 'failed',
-    'incomplete': 'failed',
-    'corrections': 'failed',
-    'corrections required': 'failed',
-    'assess reinspection fee': 'failed',
-    'disapproved': 'failed',
-    'disapproved w/reinspection fee': 'failed',
-    'reinsp fee chrg': 'failed',
-    're-inpection': 'failed',    # typo included here
-    're-inspection': 'failed',
-    'reinspection': 'failed',
-    'plan revisions required': 'failed',
-    'fail - not ready': 'failed',           
-    'fail - corrections required': 'failed',
-    'fail - revision required': 'failed',   
-    'conditional': 'failed',                
-    'partial pass':'failed',
-    'not ready': 'failed',
-    'no access': 'failed',
-    
-    # Canceled
-    'cancelled': 'canceled',
-    'canceled': 'canceled',
-    'cancel': 'canceled',
-    'issued': 'canceled',
-    'inspection not required': 'canceled',
-    'cancelled - due to weather': 'canceled',    # added
-    'cancelled - see comments': 'canceled',      # added
-    'cancelled - contractor/owne': 'canceled',   # added
-    
-    # Empty (remove)
-    'pending': '',
-    'scheduled': '',
-    'note': '',
-    'incorrect inspection type': '',
-    'comment': '',
-    '2': ''
-}
-
-standard_columns = [
-    "solarAPP_or_traditional", "AHJ", "permit_ID", "solarAPP_ID", "address", 
-    "project_type", "permit_status", "permit_submission_date", "permit_issuance_date", 
-    "inspt_failed_once", "inspt_status_last", "inspt_date_last", "inspt_notes_last", 
-    "inspt_status_1", "inspt_date_1", "inspt_notes_1", "inspt_status_2", "inspt_date_2", "inspt_notes_2", 
-    "inspt_status_3", "inspt_date_3", "inspt_notes_3", "inspt_status_4", "inspt_date_4", "inspt_notes_4", 
-    "inspt_status_5", "inspt_date_5", "inspt_notes_5", "inspt_status_6", "inspt_date_6", "inspt_notes_6", 
-    "inspt_status_7", "inspt_date_7", "inspt_notes_7", "inspt_status_8", "inspt_date_8", "inspt_notes_8", 
-    "inspt_status_9", "inspt_date_9", "inspt_notes_9", "inspt_status_10", "inspt_date_10", "inspt_notes_10"
-]
+from .mappings import inspection_status_mapping, permit_status_mapping, project_type_mapping, provenance_columns, standard_columns
+from .provenance import is_provenance_column, mark_rule, _changed, _merge_rules
 
-# FUNCTIONS
 def get_inspt_failed(row):
     """
     Determine if a permit has failed any inspections.
@@ -198,6 +44,7 @@ def add_inspt_failed_once_column(df):
     """
     # Generate the column
     df['inspt_failed_once'] = df.apply(get_inspt_failed, axis=1)
+    mark_rule(df, 'inspt_failed_once', df['inspt_failed_once'] != '')
 
     # Reorder the column to be right after 'permit_issuance_date'
     cols = df.columns.tolist()
@@ -213,135 +60,6 @@ def add_inspt_failed_once_column(df):
 
     return df
 
-def Merge_Inspections(df):
-    # Step 1: Split permits and inspections
-    permit_cols = [
-        'solarAPP_or_traditional', 'AHJ', 'permit_ID', 'solarAPP_ID', 'address',
-        'project_type', 'permit_status', 'permit_submission_date', 'permit_issuance_date'
-    ]
-    permit_df = df.drop_duplicates(subset='permit_ID')[permit_cols].set_index('permit_ID')
-
-    inspections_df = df[['permit_ID', 'inspt_status_last', 'inspt_date_last', 'inspt_notes_last']].copy()
-    inspections_df = inspections_df.dropna(subset=['inspt_date_last'])  # Ensure proper sorting
-
-    # Step 2: Rank inspections by date
-    inspections_df = inspections_df.sort_values(by=['permit_ID', 'inspt_date_last'])
-    inspections_df['rnk'] = inspections_df.groupby('permit_ID').cumcount() + 1
-
-    # Step 3: Pivot inspections to wide
-    inspections_wide = pd.DataFrame()
-    for i in range(1, 9):
-        rnk_df = inspections_df[inspections_df['rnk'] == i].set_index('permit_ID')[
-            ['inspt_status_last', 'inspt_date_last', 'inspt_notes_last']
-        ].rename(columns={
-            'inspt_status_last': f'inspt_status_{i}',
-            'inspt_date_last': f'inspt_date_{i}',
-            'inspt_notes_last': f'inspt_notes_{i}'
-        })
-        inspections_wide = inspections_wide.join(rnk_df, how='outer') if not inspections_wide.empty else rnk_df
-
-    # Step 4: Join base permits with inspections
-    combined = permit_df.join(inspections_wide, how='left')
-
-    # Step 5: Final column ordering
-    inspection_cols = []
-    for i in range(1, 9):
-        inspection_cols += [f'inspt_status_{i}', f'inspt_date_{i}', f'inspt_notes_{i}']
-
-    reordered_cols = permit_cols + ['inspt_status_last', 'inspt_date_last', 'inspt_notes_last'] + inspection_cols 
-    combined = combined.reset_index()
-    combined = combined[[col for col in reordered_cols if col in combined.columns]]
-
-    return combined
-
-def load_files(file_paths):
-    """
-    Concatenates multiple CSV/XLSX files if their column headers match in order.
-    Drops fully duplicated rows in the final result.
-    
-    Args:
-        file_paths (list of str): Paths to the files to be concatenated.
-        
-    Returns:
-        pd.DataFrame: Cleaned DataFrame.
-    """
-    if len(file_paths) == 0:
-        print("⚠️  No files provided.")
-        return pd.DataFrame()
-    
-    if len(file_paths) == 1:
-        file = file_paths[0]
-        try:
-            df = load_file_by_extension(file)
-            print(f"✅ A single file with {len(df)} rows has been loaded.")
-            return df.drop_duplicates()
-        except Exception as e:
-            print(f"❌ Error reading {file}: {e}")
-            return pd.DataFrame()
-
-    concatenated_df = pd.DataFrame()
-    base_columns = None
-
-    for file in file_paths:
-        try:
-            df = load_file_by_extension(file)
-
-            if base_columns is None:
-                base_columns = list(df.columns)
-                concatenated_df = df
-            elif list(df.columns) == base_columns:
-                concatenated_df = pd.concat([concatenated_df, df], ignore_index=True)
-                concatenated_df.dropna(how='all', inplace=True)
-                print('Succesfully concatenated!')
-                cleaned_df = concatenated_df.drop_duplicates()
-                print(f"✅ Merged {len(file_paths)} files into a DataFrame with {len(cleaned_df)} rows.")
-            else:
-                print(f"⚠️  Header mismatch in file: {file}")
-                print(f"    Expected: {base_columns}")
-                print(f"    Found:    {list(df.columns)}")
-        except Exception as e:
-            print(f"❌ Error reading {file}: {e}")
-    concatenated_df = concatenated_df.replace('NA', '')
-    concatenated_df = concatenated_df.replace('NULL', '')
-    return concatenated_df.drop_duplicates()
-
-def load_file_by_extension(file_path):
-    """
-    Loads a file based on its extension.
-    Supports .xlsx and .csv.
-
-    Args:
-        file_path (str): Path to the file.
-
-    Returns:
-        pd.DataFrame
-    """
-    ext = os.path.splitext(file_path)[-1].lower()
-    if ext == '.xlsx':
-        return pd.read_excel(file_path)
-    elif ext == '.csv':
-        return pd.read_csv(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
-
-def get_file_list(folder='raw', extensions=('xlsx', 'csv')):
-
-    """
-    Returns a list of file paths in the given folder that match the provided extensions.
-    
-    Args:
-        folder (str): Subdirectory containing the files.
-        extensions (tuple): File extensions to include (e.g., ('xlsx', 'csv')).
-
-    Returns:
-        list of str: Full paths to matching files.
-    """
-    return [
-        os.path.join(folder, file)
-        for file in os.listdir(folder)
-        if file.lower().endswith(extensions)
-    ]
-
 def filter(df, column, values_to_keep):
     """
     Filters a DataFrame to keep only rows where the given column matches one or more specified values.
@@ -370,6 +88,83 @@ def filter(df, column, values_to_keep):
     print(f"✅ Filtered DataFrame: {removed} rows removed, {new_len} rows remain with {column} == {values_to_keep}")
     return filtered_df
 
+def assign_solarAPP_or_traditional(df, already_provided=None, ids_available=None):
+    """
+    Assigns 'solarAPP_or_traditional' column based on:
+    - 'solarAPP_ID' if available and 'solarAPP_or_traditional' is not already populated
+    - Fallback to 'DESCRIPTION' if available and contains 'solarapp' keywords
+
+    Args:
+        df (pd.DataFrame): The DataFrame to modify.
+        already_provided (bool, optional): Whether 'solarAPP_or_traditional' already has values.
+        ids_available (bool, optional): Whether 'solarAPP_ID' has usable values.
+            Both are computed from df when not given; pass them when df is only one partition of the AHJ.
+
+    Returns:
+        pd.DataFrame: The modified DataFrame.
+    """
+    # If the column already exists and has meaningful values, skip reassignment
+    if already_provided is None:
+        already_provided = False
+        if 'solarAPP_or_traditional' in df.columns:
+            existing = df['solarAPP_or_traditional'].astype(str).str.strip().replace('nan', '')
+            already_provided = (existing != '').any()
+
+    if already_provided:
+        print("ℹ️ 'solarAPP_or_traditional' column already provided — no reassignment needed.")
+        return df
+
+    # If solarAPP_ID exists, assign based on it
+    if 'solarAPP_ID' in df.columns:
+        cleaned_ids = df['solarAPP_ID'].astype(str).str.strip()
+        has_values = (cleaned_ids != '') & (cleaned_ids.str.lower() != 'nan')
+
+        if ids_available is None:
+            ids_available = has_values.any()
+
+        if ids_available:
+            df['solarAPP_or_traditional'] = np.where(
+                has_values,
+                'solarAPP',
+                'traditional'
+            )
+            mark_rule(df, 'solarAPP_or_traditional', True)
+            print("✅ 'solarAPP_or_traditional' column assigned based on 'solarAPP_ID'.")
+            return df
+
+        else:
+            print("ℹ️ 'solarAPP_ID' exists but contains no usable values.")
+
+    # If DESCRIPTION exists, fallback method (optional you can add here)
+    if 'DESCRIPTION' in df.columns:
+        description = df['DESCRIPTION'].astype(str).str.lower()
+        df['solarAPP_or_traditional'] = np.where(
+            description.str.contains('solarapp'),
+            'solarAPP',
+            'traditional'
+        )
+        mark_rule(df, 'solarAPP_or_traditional', True)
+        print("✅ 'solarAPP_or_traditional' column assigned based on 'DESCRIPTION' field.")
+        return df
+
+    print("⚠️ Could not assign 'solarAPP_or_traditional'. No suitable fields found.")
+    return df
+
+def assign_AHJ(df):
+    """
+    Assigns the current folder name as the 'AHJ' value for all rows in the DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to modify.
+
+    Returns:
+        pd.DataFrame: The modified DataFrame with 'AHJ' column added.
+    """
+    ahj_name = os.path.basename(os.getcwd())
+    df['AHJ'] = ahj_name
+    print(f"✅ 'AHJ' column assigned using current directory: '{ahj_name}'")
+    return df
+
 def assign_project_type(df):
     """
     Assigns or standardizes the 'project_type' column in the DataFrame.
@@ -383,6 +178,8 @@ def assign_project_type(df):
     Returns:
         pd.DataFrame: The modified DataFrame.
     """
+    original = df['project_type'].copy() if 'project_type' in df.columns else None
+
     if 'project_type' not in df.columns and 'DESCRIPTION' in df.columns:
         df['project_type'] = np.where(
             df['DESCRIPTION'].isna() | (df['DESCRIPTION'].str.strip() == ''),
@@ -393,6 +190,7 @@ def assign_project_type(df):
                 'PV'
             )
         )
+        mark_rule(df, 'project_type', df['project_type'] != '')
         print("✅ 'project_type' column created based on 'DESCRIPTION' values.")
     
     elif 'project_type' in df.columns:
@@ -404,6 +202,7 @@ def assign_project_type(df):
             .map(project_type_mapping)
             .fillna(df['project_type'])  # keep original if not mapped
         )
+        mark_rule(df, 'project_type', _changed(original, df['project_type']))
         unique_vals = df['project_type'].dropna().unique()
         print(f"✅ 'project_type' column cleaned and standardized using mapping. ⚠️ Unique values: {list(unique_vals)} — Need to check these values!!")
 
@@ -413,9 +212,53 @@ def assign_project_type(df):
 
     return df
 
-def standardize_inspection_status_old(df):
+def map_inspection_status(df):
+    """
+    Maps all 'inspt_status_1' to 'inspt_status_10' columns using inspection_status_mapping.
+    Prints unique values across all mapped columns.
+    Skips mapping if no inspection data is present.
+    """
+    columns_to_map = [f'inspt_status_{i}' for i in range(1, 11)]
+    columns_to_map = [col for col in columns_to_map if col in df.columns]
+
+    if not columns_to_map:
+        print("ℹ️ No inspection status columns found.")
+        return df
+
+    has_inspections = df[columns_to_map].notna().any(axis=1).any()
+    if not has_inspections:
+        print("ℹ️ No inspections to be mapped.")
+        return df
+
+    # Map values
+    touched = False
+    for col in columns_to_map:
+        original = df[col]
+        df[col] = (
+            df[col]
+            .astype(str)
+            .str.strip()
+            .str.lower()
+            .map(inspection_status_mapping)
+            .combine_first(df[col])
+        )
+        if 'rules_touched' in df.columns:
+            touched = touched | _changed(original, df[col])
+    mark_rule(df, 'inspection_status', touched)
+
+    # Collect all unique mapped values
+    unique_vals = set()
+    for col in columns_to_map:
+        unique_vals.update(df[col].dropna().unique())
+
+    print(f"✅ Inspection status columns mapped. ⚠️ Unique values across status_1–10: {list(unique_vals)} — Need to check these values!")
+
+    return df
+
+def standardize_inspection_status(df):
     """
     Ensures inspection status columns exist, creates 'inspt_status_last' if missing,
+    replaces certain canceled inspections with 'failed' based on notes,
     and standardizes all inspection status values using mapping.
 
     Args:
@@ -425,16 +268,31 @@ def standardize_inspection_status_old(df):
         pd.DataFrame: The modified DataFrame.
     """
 
-    # Define status columns
+    # -------- Step 0: Replace canceled inspection notes with 'failed' ----------
+    canceled2failed = [
+        "no access", "not onsite", "not on site", "not at home",
+        "no answer", "not answer", "no one home", "nobody", "nobody answer",
+        "no one onsite", "no one", "no one at home"
+    ]
+    notes_cols = ['inspt_notes_last'] + [f'inspt_notes_{i}' for i in range(1, 9)]
+
+    modified_cells = 0
+    for col in notes_cols:
+        if col in df.columns:
+            mask = df[col].astype(str).apply(lambda x: any(word in x.lower() for word in canceled2failed))
+            modified_cells += mask.sum()
+            df.loc[mask, col] = 'failed'
+    print(f"🔁 Replaced {modified_cells} canceled notes with 'failed' in notes columns.")
+
+    # -------- Step 1: Ensure all status columns exist ----------
     status_columns = [f'inspt_status_{i}' for i in range(1, 11)]
     columns_to_map = ['inspt_status_last'] + status_columns
 
-    # Ensure all numbered status columns exist
     for col in status_columns:
         if col not in df.columns:
             df[col] = ''
 
-    # Create 'inspt_status_last' if missing
+    # -------- Step 2: Create 'inspt_status_last' if missing ----------
     if 'inspt_status_last' not in df.columns:
         def get_last_value(row, cols):
             for col in reversed(cols):
@@ -445,7 +303,7 @@ def standardize_inspection_status_old(df):
         df['inspt_status_last'] = df.apply(lambda row: get_last_value(row, status_columns), axis=1)
         print("✅ 'inspt_status_last' column created based on last non-empty status.")
 
-    # Standardize values using mapping
+    # -------- Step 3: Apply mapping to standardize status values ----------
     for col in columns_to_map:
         if col in df.columns:
             df[col] = (
@@ -456,72 +314,82 @@ def standardize_inspection_status_old(df):
                 .map(inspection_status_mapping)
                 .combine_first(df[col])
             )
+
     unique_vals = df['inspt_status_last'].dropna().unique()
     print(f"✅ Inspection status columns standardized using mapping. ⚠️ Unique values in 'inspt_status_last': {list(unique_vals)} — Need to check these values!")
 
     return df
 
-def assign_permit_status(df):
+def assign_last_inspection_fields(df):
     """
-    Standardizes or infers the 'permit_status' column in the DataFrame.
+    Creates 'inspt_status_last', 'inspt_date_last', and 'inspt_notes_last'
+    by taking the last non-empty value from their respective series of columns.
+    Inserts them immediately before 'inspt_status_1'.
+    """
+    # Define the inspection columns to search
+    status_cols = [f'inspt_status_{i}' for i in range(1, 11)]
+    date_cols = [f'inspt_date_{i}' for i in range(1, 11)]
+    notes_cols = [f'inspt_notes_{i}' for i in range(1, 11)]
 
-    - If 'permit_status' exists: normalize and map using utils.permit_status_mapping.
-      Also update 'inspt_status_last' to 'passed' where appropriate.
-    - If 'permit_status' is missing: infer it based on inspection status and submission date.
+    # Ensure all expected columns exist
+    for col_list in [status_cols, date_cols, notes_cols]:
+        for col in col_list:
+            if col not in df.columns:
+                df[col] = ''
 
-    Args:
-        df (pd.DataFrame): The DataFrame to modify.
+    # Define helper to get last non-empty value
+    def get_last_value(row, cols):
+        for col in reversed(cols):
+            value = row.get(col)
+            if pd.notnull(value) and str(value).strip() != '':
+                return value
+        return ''
 
-    Returns:
-        pd.DataFrame: The modified DataFrame.
-    """
-    #if 'permit_status' in df.columns:
-    if 'permit_status' in df.columns and df['permit_status'].replace('', pd.NA).notna().any():
+    # Create the _last columns if they don't already exist
+    if 'inspt_status_last' not in df.columns:
+        df['inspt_status_last'] = df.apply(lambda row: get_last_value(row, status_cols), axis=1)
+        mark_rule(df, 'last_inspection_fields', df['inspt_status_last'] != '')
+        print("✅ 'inspt_status_last' column created from last non-empty status.")
 
-        df['permit_status'] = (
-            df['permit_status']
-            .astype(str)
-            .str.strip()
-            .str.lower()
-            .map(permit_status_mapping)
-            .fillna(df['permit_status'])  # retain original if not mapped
-        )
-        print(f"✅ 'permit_status' column standardized. Check unique values: {df['permit_status'].dropna().unique()}")
+    if 'inspt_date_last' not in df.columns:
+        df['inspt_date_last'] = df.apply(lambda row: get_last_value(row, date_cols), axis=1)
+        mark_rule(df, 'last_inspection_fields', df['inspt_date_last'] != '')
+        print("✅ 'inspt_date_last' column created from last non-empty date.")
 
-        if 'inspt_status_last' in df.columns:
-            condition = (
-                (df['permit_status'] == 'finaled') &
-                ((df['inspt_status_last'].isna()) | (df['inspt_status_last'] == ''))
-            )
-            df.loc[condition, 'inspt_status_last'] = 'passed'
-            print(f"✅ 'inspt_status_last' updated to 'passed' where permit was 'finaled' and status was missing.")
-    
+    if 'inspt_notes_last' not in df.columns:
+        df['inspt_notes_last'] = df.apply(lambda row: get_last_value(row, notes_cols), axis=1)
+        mark_rule(df, 'last_inspection_fields', df['inspt_notes_last'] != '')
+        print("✅ 'inspt_notes_last' column created from last non-empty notes.")
+    if (
+        'inspt_failed_once' not in df.columns or
+        df['inspt_failed_once'].astype(str).str.strip().eq('').all()
+    ):
+        df = add_inspt_failed_once_column(df)
     else:
-        def infer_permit_status(row):
-            status = row.get('inspt_status_last', '')
-            submitted = row.get('permit_submission_date', '')
+        print("ℹ️ 'inspt_failed_once' column already exists and has values — skipping.")
 
-            # Condition 1: clearly passed
-            if status == 'passed':
-                return 'finaled'
-            # Condition 2: clearly failed
-            elif status in ['failed', 'canceled']:
-                return 'issued'
 
-            # Condition 3: no status but something was submitted and we have inspection signs
-            elif status == '' and submitted != '':
-                has_any_inspection = any(
-                    str(row.get(col, '')).strip() != ''
-                    for col in ['inspt_status_1', 'inspt_date_1', 'inspt_notes_1']
-                )
-                if has_any_inspection:
-                    return 'issued'
-                else:
-                    return 'issued'  # still counts as submitted
-            return ''
+    # Move the 3 _last columns right before 'inspt_status_1'
+    last_cols = ['inspt_failed_once','inspt_status_last', 'inspt_date_last', 'inspt_notes_last']
+    cols = df.columns.tolist()
 
-        df['permit_status'] = df.apply(infer_permit_status, axis=1)
-        print("✅ 'permit_status' column inferred from inspection status and submission date.")
+    for col in last_cols:
+        if col in cols:
+            cols.remove(col)
+
+    try:
+        insert_idx = cols.index('inspt_status_1')
+    except ValueError:
+        insert_idx = len(cols)  # fallback to end if 'inspt_status_1' not found
+
+    for col in reversed(last_cols):
+        cols.insert(insert_idx, col)
+
+    # Keep provenance columns, if any, at the end
+    cols = [col for col in cols if not is_provenance_column(col)] + [col for col in cols if is_provenance_column(col)]
+
+    # Reorder DataFrame
+    df = df[cols]
 
     return df
 
@@ -543,191 +411,83 @@ def standardize_format(df):
         if col not in df.columns:
             df[col] = None
 
-    # Reorder and copy to avoid SettingWithCopyWarning
-    df = df[required_cols].copy()
+    # Reorder and copy to avoid SettingWithCopyWarning (provenance columns, if any, go last)
+    df = df[required_cols + [col for col in provenance_columns if col in df.columns]].copy()
 
     # Drop duplicate rows
-    df.drop_duplicates(inplace=True)
+    df.drop_duplicates(subset=required_cols, inplace=True)
 
     return df
 
-def assign_solarAPP_or_traditional(df):
+def assign_permit_status(df, status_provided=None):
     """
-    Assigns 'solarAPP_or_traditional' column based on:
-    - 'solarAPP_ID' if available and 'solarAPP_or_traditional' is not already populated
-    - Fallback to 'DESCRIPTION' if available and contains 'solarapp' keywords
+    Standardizes or infers the 'permit_status' column in the DataFrame.
+
+    - If 'permit_status' exists: normalize and map using utils.permit_status_mapping.
+      Also update 'inspt_status_last' to 'passed' where appropriate.
+    - If 'permit_status' is missing: infer it based on inspection status and submission date.
 
     Args:
         df (pd.DataFrame): The DataFrame to modify.
+        status_provided (bool, optional): Whether the AHJ provides permit statuses. Computed from df
+            when not given; pass it when df is only one partition of the AHJ.
 
     Returns:
         pd.DataFrame: The modified DataFrame.
     """
-    # If the column already exists and has meaningful values, skip reassignment
-    if 'solarAPP_or_traditional' in df.columns:
-        existing = df['solarAPP_or_traditional'].astype(str).str.strip().replace('nan', '')
-        if (existing != '').any():
-            print("ℹ️ 'solarAPP_or_traditional' column already provided — no reassignment needed.")
-            return df
-
-    # If solarAPP_ID exists, assign based on it
-    if 'solarAPP_ID' in df.columns:
-        cleaned_ids = df['solarAPP_ID'].astype(str).str.strip()
-        has_values = (cleaned_ids != '') & (cleaned_ids.str.lower() != 'nan')
+    if status_provided is None:
+        status_provided = 'permit_status' in df.columns and df['permit_status'].replace('', pd.NA).notna().any()
 
-        if has_values.any():
-            df['solarAPP_or_traditional'] = np.where(
-                has_values,
-                'solarAPP',
-                'traditional'
-            )
-            print("✅ 'solarAPP_or_traditional' column assigned based on 'solarAPP_ID'.")
-            return df
-
-        else:
-            print("ℹ️ 'solarAPP_ID' exists but contains no usable values.")
-
-    # If DESCRIPTION exists, fallback method (optional you can add here)
-    if 'DESCRIPTION' in df.columns:
-        description = df['DESCRIPTION'].astype(str).str.lower()
-        df['solarAPP_or_traditional'] = np.where(
-            description.str.contains('solarapp'),
-            'solarAPP',
-            'traditional'
+    #if 'permit_status' in df.columns:
+    if status_provided:
+        original = df['permit_status'].copy()
+        df['permit_status'] = (
+            df['permit_status']
+            .astype(str)
+            .str.strip()
+            .str.lower()
+            .map(permit_status_mapping)
+            .fillna(df['permit_status'])  # retain original if not mapped
         )
-        print("✅ 'solarAPP_or_traditional' column assigned based on 'DESCRIPTION' field.")
-        return df
-
-    print("⚠️ Could not assign 'solarAPP_or_traditional'. No suitable fields found.")
-    return df
-
-def load_files(file_paths):
-    """
-    Concatenates multiple CSV/XLSX files if their column headers match in order.
-    Drops fully duplicated rows in the final result.
-
-    Args:
-        file_paths (list of str): Paths to the files to be concatenated.
-
-    Returns:
-        pd.DataFrame: Cleaned DataFrame.
-    """
-    if len(file_paths) == 0:
-        print("⚠️  No files provided.")
-        return pd.DataFrame()
-
-    if len(file_paths) == 1:
-        file = file_paths[0]
-        try:
-            df = load_file_by_extension(file)
-            print(f"✅ Loaded single file '{file}' with {len(df)} rows.")
-            return df.drop_duplicates()
-        except Exception as e:
-            print(f"❌ Error reading {file}: {e}")
-            return pd.DataFrame()
-
-    concatenated_df = pd.DataFrame()
-    base_columns = None
-    total_rows_before_dedup = 0
-
-    for file in file_paths:
-        try:
-            df = load_file_by_extension(file)
-            print(f"📄 File '{file}' loaded with {len(df)} rows.")
-
-            if base_columns is None:
-                base_columns = list(df.columns)
-                concatenated_df = df
-            elif list(df.columns) == base_columns:
-                concatenated_df = pd.concat([concatenated_df, df], ignore_index=True)
-            else:
-                print(f"⚠️  Header mismatch in file: {file}")
-                print(f"    Expected: {base_columns}")
-                print(f"    Found:    {list(df.columns)}")
-
-        except Exception as e:
-            print(f"❌ Error reading {file}: {e}")
-
-    # Remove fully empty rows and drop duplicates
-    concatenated_df.dropna(how='all', inplace=True)
-    total_rows_before_dedup = len(concatenated_df)
-    cleaned_df = concatenated_df.drop_duplicates()
-
-    # Replace NULL by empty
-    cleaned_df = cleaned_df.replace('NULL', '')
-    cleaned_df = cleaned_df.replace('NA', '')
-
-
-    print(f"\n✅ Finished merging {len(file_paths)} files.")
-    print(f"📊 Total rows before deduplication: {total_rows_before_dedup}")
-    print(f"📉 Rows after deduplication: {len(cleaned_df)}")
-
-    return cleaned_df
-
-def assign_last_inspection_fields(df):
-    """
-    Creates 'inspt_status_last', 'inspt_date_last', and 'inspt_notes_last'
-    by taking the last non-empty value from their respective series of columns.
-    Inserts them immediately before 'inspt_status_1'.
-    """
-    # Define the inspection columns to search
-    status_cols = [f'inspt_status_{i}' for i in range(1, 11)]
-    date_cols = [f'inspt_date_{i}' for i in range(1, 11)]
-    notes_cols = [f'inspt_notes_{i}' for i in range(1, 11)]
-
-    # Ensure all expected columns exist
-    for col_list in [status_cols, date_cols, notes_cols]:
-        for col in col_list:
-            if col not in df.columns:
-                df[col] = ''
-
-    # Define helper to get last non-empty value
-    def get_last_value(row, cols):
-        for col in reversed(cols):
-            value = row.get(col)
-            if pd.notnull(value) and str(value).strip() != '':
-                return value
-        return ''
-
-    # Create the _last columns if they don't already exist
-    if 'inspt_status_last' not in df.columns:
-        df['inspt_status_last'] = df.apply(lambda row: get_last_value(row, status_cols), axis=1)
-        print("✅ 'inspt_status_last' column created from last non-empty status.")
-
-    if 'inspt_date_last' not in df.columns:
-        df['inspt_date_last'] = df.apply(lambda row: get_last_value(row, date_cols), axis=1)
-        print("✅ 'inspt_date_last' column created from last non-empty date.")
+        mark_rule(df, 'permit_status', _changed(original, df['permit_status']))
+        print(f"✅ 'permit_status' column standardized. Check unique values: {df['permit_status'].dropna().unique()}")
 
-    if 'inspt_notes_last' not in df.columns:
-        df['inspt_notes_last'] = df.apply(lambda row: get_last_value(row, notes_cols), axis=1)
-        print("✅ 'inspt_notes_last' column created from last non-empty notes.")
-    if (
-        'inspt_failed_once' not in df.columns or
-        df['inspt_failed_once'].astype(str).str.strip().eq('').all()
-    ):
-        df = add_inspt_failed_once_column(df)
+        if 'inspt_status_last' in df.columns:
+            condition = (
+                (df['permit_status'] == 'finaled') &
+                ((df['inspt_status_last'].isna()) | (df['inspt_status_last'] == ''))
+            )
+            df.loc[condition, 'inspt_status_last'] = 'passed'
+            mark_rule(df, 'passed_by_finaled_permit', condition)
+            print(f"✅ 'inspt_status_last' updated to 'passed' where permit was 'finaled' and status was missing.")
+    
     else:
-        print("ℹ️ 'inspt_failed_once' column already exists and has values — skipping.")
-
-
-    # Move the 3 _last columns right before 'inspt_status_1'
-    last_cols = ['inspt_failed_once','inspt_status_last', 'inspt_date_last', 'inspt_notes_last']
-    cols = df.columns.tolist()
-
-    for col in last_cols:
-        if col in cols:
-            cols.remove(col)
+        def infer_permit_status(row):
+            status = row.get('inspt_status_last', '')
+            submitted = row.get('permit_submission_date', '')
 
-    try:
-        insert_idx = cols.index('inspt_status_1')
-    except ValueError:
-        insert_idx = len(cols)  # fallback to end if 'inspt_status_1' not found
+            # Condition 1: clearly passed
+            if status == 'passed':
+                return 'finaled'
+            # Condition 2: clearly failed
+            elif status in ['failed', 'canceled']:
+                return 'issued'
 
-    for col in reversed(last_cols):
-        cols.insert(insert_idx, col)
+            # Condition 3: no status but something was submitted and we have inspection signs
+            elif status == '' and submitted != '':
+                has_any_inspection = any(
+                    str(row.get(col, '')).strip() != ''
+                    for col in ['inspt_status_1', 'inspt_date_1', 'inspt_notes_1']
+                )
+                if has_any_inspection:
+                    return 'issued'
+                else:
+                    return 'issued'  # still counts as submitted
+            return ''
 
-    # Reorder DataFrame
-    df = df[cols]
+        df['permit_status'] = df.apply(infer_permit_status, axis=1)
+        mark_rule(df, 'permit_status', df['permit_status'] != '')
+        print("✅ 'permit_status' column inferred from inspection status and submission date.")
 
     return df
 
@@ -748,10 +508,18 @@ def Merge_Inspections(df):
     ]
 
     # Step 2: Extract permit-level data (drop duplicates based on permit_ID)
-    permit_df = df.drop_duplicates(subset='permit_ID')[permit_cols].set_index('permit_ID')
+    provenance = [col for col in provenance_columns if col in df.columns]
+    permit_df = df.drop_duplicates(subset='permit_ID')[permit_cols + provenance].set_index('permit_ID')
+    if 'rules_touched' in provenance:
+        permit_df['rules_touched'] = _merge_rules(df).reindex(permit_df.index)
 
     # Step 3: Prepare inspection data (only keep rows with a valid inspection date)
-    inspections_df = df[['permit_ID', 'inspt_status_1', 'inspt_date_1', 'inspt_notes_1']].copy()
+    fields = ['inspt_status_1', 'inspt_date_1', 'inspt_notes_1']
+    inspections_df = df[['permit_ID'] + fields].copy()
+    if 'source_row' in provenance:
+        # Raw file and row of each inspection, packed as source_file * 2**32 + source_row
+        inspections_df['inspt_source_1'] = (df['source_file'].astype('int64') * 2 ** 32 + df['source_row']).astype('Int64')
+        fields.append('inspt_source_1')
     inspections_df = inspections_df.dropna(subset=['inspt_date_1'])
 
     # Step 4: Sort inspections and rank them per permit
@@ -762,16 +530,15 @@ def Merge_Inspections(df):
     inspections_wide = pd.DataFrame()
 
     for i in range(1, 9):  # Support up to 8 inspections per permit
-        rnk_df = inspections_df[inspections_df['rnk'] == i].set_index('permit_ID')[
-            ['inspt_status_1', 'inspt_date_1', 'inspt_notes_1']
-        ].rename(columns={
+        rnk_df = inspections_df[inspections_df['rnk'] == i].set_index('permit_ID')[fields].rename(columns={
             'inspt_status_1': f'inspt_status_{i}',
             'inspt_date_1': f'inspt_date_{i}',
-            'inspt_notes_1': f'inspt_notes_{i}'
+            'inspt_notes_1': f'inspt_notes_{i}',
+            'inspt_source_1': f'inspt_source_{i}'
         })
 
-        # Join each ranked inspection attempt
-        inspections_wide = inspections_wide.join(rnk_df, how='outer') if not inspections_wide.empty else rnk_df
+        # Join each ranked inspection attempt (keeps every rank's columns even when there are no inspections)
+        inspections_wide = inspections_wide.join(rnk_df, how='outer') if i > 1 else rnk_df
 
     # Step 6: Join the permit data with the wide-format inspections
     combined = permit_df.join(inspections_wide, how='left')
@@ -782,74 +549,31 @@ def Merge_Inspections(df):
         inspection_cols += [f'inspt_status_{i}', f'inspt_date_{i}', f'inspt_notes_{i}']
 
     reordered_cols = permit_cols + inspection_cols
+    if provenance:
+        reordered_cols += [f'inspt_source_{i}' for i in range(1, 9)] + provenance
     combined = combined.reset_index()
     combined = combined[[col for col in reordered_cols if col in combined.columns]]
 
     return combined
 
-def map_inspection_status(df):
-    """
-    Maps all 'inspt_status_1' to 'inspt_status_10' columns using inspection_status_mapping.
-    Prints unique values across all mapped columns.
-    Skips mapping if no inspection data is present.
-    """
-    columns_to_map = [f'inspt_status_{i}' for i in range(1, 11)]
-    columns_to_map = [col for col in columns_to_map if col in df.columns]
-
-    if not columns_to_map:
-        print("ℹ️ No inspection status columns found.")
-        return df
-
-    has_inspections = df[columns_to_map].notna().any(axis=1).any()
-    if not has_inspections:
-        print("ℹ️ No inspections to be mapped.")
-        return df
-
-    # Map values
-    for col in columns_to_map:
-        df[col] = (
-            df[col]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-            .map(inspection_status_mapping)
-            .combine_first(df[col])
-        )
-
-    # Collect all unique mapped values
-    unique_vals = set()
-    for col in columns_to_map:
-        unique_vals.update(df[col].dropna().unique())
-
-    print(f"✅ Inspection status columns mapped. ⚠️ Unique values across status_1–10: {list(unique_vals)} — Need to check these values!")
-
-    return df
-
-def final_save(df, filename='Clean.xlsx', sheet_name='Clean'):
-    """
-    Saves the given DataFrame to an Excel file.
-
-    Args:
-        df (pd.DataFrame): The DataFrame to save.
-        filename (str): Output filename (default: 'Clean.xlsx').
-        sheet_name (str): Sheet name inside the Excel file (default: 'Clean').
-    """
-    df.to_excel(filename, sheet_name=sheet_name, index=False)
-    print(f"📁 Cleaned DataFrame saved to '{filename}'.")
-
-def Do_Merge_Inspections_OLD(df):
+def Do_Merge_Inspections(df, has_duplicates=None, has_inspections=None):
     """
     Checks for duplicate permit_IDs and available inspection data.
     If both exist, merges inspection records using Merge_Inspections() and assigns *_last fields.
 
     Args:
         df (pd.DataFrame): Input DataFrame.
+        has_duplicates (bool, optional): Whether any permit_ID appears more than once.
+        has_inspections (bool, optional): Whether any row has last inspection data.
+            Both are computed from df when not given; pass them when df is only one partition of the AHJ.
 
     Returns:
         pd.DataFrame: Modified DataFrame (merged if needed).
     """
-    has_duplicates = df['permit_ID'].duplicated().any()
-    has_inspections = df[['inspt_status_last', 'inspt_date_last', 'inspt_notes_last']].notna().any(axis=1).any()
+    if has_duplicates is None:
+        has_duplicates = df['permit_ID'].duplicated().any()
+    if has_inspections is None:
+        has_inspections = df[['inspt_status_last', 'inspt_date_last', 'inspt_notes_last']].notna().any(axis=1).any()
 
     if has_duplicates and has_inspections:
         df = Merge_Inspections(df)
@@ -863,108 +587,29 @@ def Do_Merge_Inspections_OLD(df):
 
     return df
 
-def assign_AHJ(df):
-    """
-    Assigns the current folder name as the 'AHJ' value for all rows in the DataFrame.
-
-    Args:
-        df (pd.DataFrame): The DataFrame to modify.
-
-    Returns:
-        pd.DataFrame: The modified DataFrame with 'AHJ' column added.
-    """
-    ahj_name = os.path.basename(os.getcwd())
-    df['AHJ'] = ahj_name
-    print(f"✅ 'AHJ' column assigned using current directory: '{ahj_name}'")
-    return df
+# The cleaning steps of the final notebook cell, in order
+cleaning_steps = [
+    assign_solarAPP_or_traditional,
+    assign_AHJ,
+    assign_project_type,
+    map_inspection_status,
+    assign_last_inspection_fields,
+    standardize_format,
+    assign_permit_status,
+    add_inspt_failed_once_column,
+    Do_Merge_Inspections
+]
 
-def standardize_inspection_status(df):
+def clean_dataframe(df):
     """
-    Ensures inspection status columns exist, creates 'inspt_status_last' if missing,
-    replaces certain canceled inspections with 'failed' based on notes,
-    and standardizes all inspection status values using mapping.
+    Runs all the cleaning steps of the final notebook cell (cleaning_steps), in the same order.
 
     Args:
-        df (pd.DataFrame): The DataFrame to modify.
+        df (pd.DataFrame): Loaded DataFrame with the columns already renamed to the standard names.
 
     Returns:
-        pd.DataFrame: The modified DataFrame.
+        pd.DataFrame: Cleaned DataFrame, ready for final_save().
     """
-
-    # -------- Step 0: Replace canceled inspection notes with 'failed' ----------
-    canceled2failed = [
-        "no access", "not onsite", "not on site", "not at home",
-        "no answer", "not answer", "no one home", "nobody", "nobody answer",
-        "no one onsite", "no one", "no one at home"
-    ]
-    notes_cols = ['inspt_notes_last'] + [f'inspt_notes_{i}' for i in range(1, 9)]
-
-    modified_cells = 0
-    for col in notes_cols:
-        if col in df.columns:
-            mask = df[col].astype(str).apply(lambda x: any(word in x.lower() for word in canceled2failed))
-            modified_cells += mask.sum()
-            df.loc[mask, col] = 'failed'
-    print(f"🔁 Replaced {modified_cells} canceled notes with 'failed' in notes columns.")
-
-    # -------- Step 1: Ensure all status columns exist ----------
-    status_columns = [f'inspt_status_{i}' for i in range(1, 11)]
-    columns_to_map = ['inspt_status_last'] + status_columns
-
-    for col in status_columns:
-        if col not in df.columns:
-            df[col] = ''
-
-    # -------- Step 2: Create 'inspt_status_last' if missing ----------
-    if 'inspt_status_last' not in df.columns:
-        def get_last_value(row, cols):
-            for col in reversed(cols):
-                value = row.get(col)
-                if pd.notnull(value) and str(value).strip() != '':
-                    return value
-            return ''
-        df['inspt_status_last'] = df.apply(lambda row: get_last_value(row, status_columns), axis=1)
-        print("✅ 'inspt_status_last' column created based on last non-empty status.")
-
-    # -------- Step 3: Apply mapping to standardize status values ----------
-    for col in columns_to_map:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .astype(str)
-                .str.strip()
-                .str.lower()
-                .map(inspection_status_mapping)
-                .combine_first(df[col])
-            )
-
-    unique_vals = df['inspt_status_last'].dropna().unique()
-    print(f"✅ Inspection status columns standardized using mapping. ⚠️ Unique values in 'inspt_status_last': {list(unique_vals)} — Need to check these values!")
-
+    for step in cleaning_steps:
+        df = step(df)
     return df
-
-def Do_Merge_Inspections(df):
-    """
-    Checks for duplicate permit_IDs and available inspection data.
-    If both exist, merges inspection records using Merge_Inspections() and assigns *_last fields.
-
-    Args:
-        df (pd.DataFrame): Input DataFrame.
-
-    Returns:
-        pd.DataFrame: Modified DataFrame (merged if needed).
-    """
-    has_duplicates = df['permit_ID'].duplicated().any()
-    has_inspections = df[['inspt_status_last', 'inspt_date_last', 'inspt_notes_last']].notna().any(axis=1).any()
-
-    if has_duplicates and has_inspections:
-        df = Merge_Inspections(df)
-        df = assign_last_inspection_fields(df)
-        print("🔁 Duplicate permit_IDs and inspections found — merging performed.")
-        print("✅ Last inspection fields assigned. ")
-    else:
-        df= assign_last_inspection_fields(df)
-        print("✅ No inspection merging needed — either no duplicates or no inspections.")
-        print("✅ Last inspection fields assigned. ")
-
-    return df
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+Watches the AHJ staging folders and keeps the cleaned outputs up to date, with no manual runs.
+
+Every AHJ folder under the staging root has a raw/ subfolder (see README). When a raw file lands
+or changes, the watcher waits until it stops changing (exports are often copied in several writes),
+parses it, cleans the AHJ with the column mapping saved in its column_mapping.json (and the filters
+saved in its filter.json, if the AHJ needs the notebook's filter cell), and rebuilds the merged dataset. Parsing and cleaning share a bounded process pool, so new files keep being
+parsed while another AHJ is being cleaned.
+
+Usage:
+    python watcher.py /path/to/staging --clean-dir /path/to/staging/clean --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import utils
+
+MAPPING_FILE = 'column_mapping.json'
+LEARNED_FILE = 'column_mapping.learned.json'
+FILTER_FILE = 'filter.json'
+# The watcher doesn't overwrite the Clean.xlsx reviewed in the notebook
+WATCHER_XLSX = 'Clean_watcher.xlsx'
+PARSED_DIR = '.parsed'
+
+# Excel lock files and partial downloads
+PARTIAL_PREFIXES = ('~$', '.')
+PARTIAL_SUFFIXES = ('.tmp', '.part', '.crdownload')
+
+
+def parse_file(path, parsed_path):
+    """
+    Worker: parses one raw file and stores it as a pickle next to the raw folder.
+
+    Args:
+        path (str): Path to the raw file.
+        parsed_path (str): Where to store the parsed DataFrame.
+
+    Returns:
+        int: Number of rows parsed.
+    """
+    if os.path.exists(parsed_path):
+        os.remove(parsed_path)
+    df = utils.load_file_by_extension(path)
+    # Written to a temporary file first, so a clean never reads a half-written pickle
+    df.to_pickle(parsed_path + '.tmp')
+    os.replace(parsed_path + '.tmp', parsed_path)
+    return len(df)
+
+def clean_ahj(ahj_dir, parsed_paths, clean_dir):
+    """
+    Worker: runs the cleanser notebook steps on the parsed files of one AHJ.
+    Saves Clean_watcher.xlsx in the AHJ folder, and '<AHJ>.csv' and '<AHJ>.arrow' in the clean folder.
+
+    Args:
+        ahj_dir (str): AHJ folder (its name is used as the AHJ).
+        parsed_paths (dict): Raw file path (relative to ahj_dir) to parsed pickle path, in load order.
+        clean_dir (str): Folder with one cleaned CSV per AHJ.
+
+    Returns:
+        int: Number of rows in the cleaned AHJ.
+    """
+    # assign_AHJ() and final_save() work on the current folder, as in the notebook
+    os.chdir(ahj_dir)
+
+    # Files with the reviewed headers are renamed with the mapping file. Files with new headers are
+    # aligned to the standard columns, and what was learned is saved apart for review
+    df = utils.load_files_aligned(list(parsed_paths), mapping_file=MAPPING_FILE,
+                                  loader=lambda path: pd.read_pickle(parsed_paths[path]),
+                                  learned_file=LEARNED_FILE)
+    df = apply_filters(df, load_json(FILTER_FILE), load_json(MAPPING_FILE) or {})
+    df = utils.clean_dataframe(df)
+    utils.final_save(df, WATCHER_XLSX)
+
+    df.to_csv(os.path.join(clean_dir, f'{os.path.basename(ahj_dir)}.csv'), index=False)
+    utils.publish_arrow(df, clean_dir)
+    return len(df)
+
+def load_json(path):
+    """
+    Reads a JSON file of the AHJ folder. None when it doesn't exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def apply_filters(df, filters, column_mapping):
+    """
+    Runs the notebook's filter cell: utils.filter() for each entry of filter.json, a list like
+    [{"column": "Inspection Type", "values_to_keep": ["Solar Final", "Solar Rough"]}].
+    A raw column that was renamed by the mapping can be given by its raw name.
+
+    Args:
+        df (pd.DataFrame): Loaded and aligned DataFrame.
+        filters (list of dict, optional): Content of filter.json (None: no filter).
+        column_mapping (dict): The AHJ's column mapping.
+
+    Returns:
+        pd.DataFrame: Filtered DataFrame.
+    """
+    for spec in filters or []:
+        column = spec['column']
+        if column not in df.columns:
+            column = column_mapping.get(column, column)
+        if column not in df.columns:
+            raise KeyError(f"filter column '{spec['column']}' not found in the loaded files")
+        df = utils.filter(df, column, spec['values_to_keep'])
+    return df
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def is_partial(file_name):
+    """
+    True for files that are still being written or are not exports (lock files, partial downloads).
+    """
+    return file_name.startswith(PARTIAL_PREFIXES) or file_name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+class StagingWatcher:
+    """
+    Polls the raw/ folders of every AHJ under staging_root and queues parse, clean and merge jobs.
+
+    Args:
+        staging_root (str): Folder that contains one folder per AHJ.
+        clean_dir (str): Folder for the cleaned CSV of each AHJ.
+        merged_path (str): Path of the merged dataset, rebuilt after each cleaned AHJ.
+        workers (int): Size of the process pool (and number of jobs in flight).
+        poll_interval (float): Seconds between scans of the staging folders.
+        settle_seconds (float): A file is parsed once its size and modification time haven't changed for this long.
+        queue_size (int): Maximum number of queued jobs; scanning waits when the queue is full.
+    """
+
+    def __init__(self, staging_root, clean_dir, merged_path, workers=4, poll_interval=5.0, settle_seconds=10.0, queue_size=100):
+        self.staging_root = os.path.abspath(staging_root)
+        self.clean_dir = os.path.abspath(clean_dir)
+        self.merged_path = os.path.abspath(merged_path)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.queue_size = queue_size
+
+        self.files = {}          # (ahj_dir, relative raw path) -> state of the file
+        self.configs = {}        # ahj_dir -> modification times of its mapping and filter files
+        self.dirty = set()       # AHJs whose cleaned output is out of date
+        self.cleaning = set()    # AHJs being cleaned
+        self.parsing = set()     # files being parsed (or queued), at most one parse each
+        self.merge_queued = False
+        self.merge_dirty = False
+        self.in_flight = 0
+        self.warned = set()
+
+    async def run(self, once=False):
+        """
+        Watches until interrupted. With once=True, returns when everything staged has been processed.
+        """
+        os.makedirs(self.clean_dir, exist_ok=True)
+        self.queue = asyncio.Queue(self.queue_size)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            self.pool = pool
+            tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            print(f"👀 Watching '{self.staging_root}' every {self.poll_interval}s with {self.workers} workers.")
+            try:
+                while True:
+                    settling = await self._scan()
+                    if once and not settling and self.in_flight == 0 and self.queue.empty() and not self.merge_dirty:
+                        break
+                    await asyncio.sleep(self.poll_interval)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _scan(self):
+        """
+        Checks every raw folder once. Returns True while some file is still settling.
+        """
+        now = time.monotonic()
+        settling = False
+        seen = set()
+
+        for ahj in sorted(os.listdir(self.staging_root)):
+            ahj_dir = os.path.join(self.staging_root, ahj)
+            raw_dir = os.path.join(ahj_dir, 'raw')
+            if not os.path.isdir(raw_dir):
+                continue
+
+            # An edited mapping or filter changes the cleaned output too
+            config = tuple(_mtime(os.path.join(ahj_dir, name)) for name in (MAPPING_FILE, FILTER_FILE))
+            if self.configs.setdefault(ahj_dir, config) != config:
+                self.configs[ahj_dir] = config
+                self.dirty.add(ahj_dir)
+
+            for file in sorted(os.listdir(raw_dir)):
+                if is_partial(file) or not file.lower().endswith(('xlsx', 'csv')):
+                    continue
+                key = (ahj_dir, os.path.join('raw', file))
+                seen.add(key)
+                try:
+                    stat = os.stat(os.path.join(raw_dir, file))
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+
+                state = self.files.get(key)
+                if state is None or state['signature'] != signature:
+                    self.files[key] = {'signature': signature, 'since': now,
+                                       'parsed': state['parsed'] if state else None, 'queued': False}
+                    settling = True
+                elif state['parsed'] != signature and not state['queued'] and key not in self.parsing:
+                    # A parse already running isn't started again: the file is parsed again after it
+                    if now - state['since'] >= self.settle_seconds:
+                        state['queued'] = True
+                        self.parsing.add(key)
+                        await self._put(self._parse, ahj_dir, key, signature)
+                    else:
+                        settling = True
+
+        # Files removed from raw/ change the AHJ too
+        for key in set(self.files) - seen:
+            del self.files[key]
+            self.dirty.add(key[0])
+
+        # No clean starts while a merge is queued or running, so the merge never reads a half-written
+        # clean file. The AHJs stay dirty and are cleaned on the next scan after it.
+        ready = [] if self.merge_queued else sorted(self.dirty - self.cleaning)
+        for ahj_dir in ready:
+            if self._ready_to_clean(ahj_dir):
+                self.dirty.discard(ahj_dir)
+                self.cleaning.add(ahj_dir)
+                await self._put(self._clean, ahj_dir)
+
+        if self.merge_dirty and not self.merge_queued and not self.cleaning:
+            self.merge_dirty = False
+            self.merge_queued = True
+            await self._put(self._merge)
+
+        return settling
+
+    def _ready_to_clean(self, ahj_dir):
+        files = [state for key, state in self.files.items() if key[0] == ahj_dir]
+        if any(state['parsed'] != state['signature'] for state in files):
+            return False
+        if not os.path.exists(os.path.join(ahj_dir, MAPPING_FILE)):
+            if ahj_dir not in self.warned:
+                print(f"⚠️  '{os.path.basename(ahj_dir)}' has no {MAPPING_FILE} — skipping until it is added.")
+                self.warned.add(ahj_dir)
+            return False
+        return True
+
+    async def _put(self, job, *args):
+        self.in_flight += 1
+        await self.queue.put((job, args))
+
+    async def _worker(self):
+        while True:
+            job, args = await self.queue.get()
+            try:
+                await job(*args)
+            except Exception as e:
+                print(f"❌ {job.__name__.strip('_')} failed for {args[:1]}: {e}")
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    async def _parse(self, ahj_dir, key, signature):
+        loop = asyncio.get_running_loop()
+        parsed_path = self._parsed_path(ahj_dir, key[1])
+        os.makedirs(os.path.dirname(parsed_path), exist_ok=True)
+        try:
+            rows = await loop.run_in_executor(self.pool, parse_file, os.path.join(ahj_dir, key[1]), parsed_path)
+            print(f"📄 Parsed '{key[1]}' of {os.path.basename(ahj_dir)} ({rows} rows).")
+        finally:
+            # A file that fails to parse is skipped when cleaning, as load_files() does. The state may
+            # have been replaced while parsing (the file changed): the parsed signature is then older
+            # than the file's, and it is parsed again.
+            self.parsing.discard(key)
+            state = self.files.get(key)
+            if state is not None:
+                state['queued'] = False
+                state['parsed'] = signature
+            self.dirty.add(ahj_dir)
+
+    async def _clean(self, ahj_dir):
+        loop = asyncio.get_running_loop()
+        parsed_paths = {
+            key[1]: self._parsed_path(ahj_dir, key[1])
+            for key in sorted(self.files) if key[0] == ahj_dir
+        }
+        try:
+            if parsed_paths:
+                rows = await loop.run_in_executor(self.pool, clean_ahj, ahj_dir, parsed_paths, self.clean_dir)
+                print(f"✅ Cleaned {os.path.basename(ahj_dir)} ({rows} rows).")
+            else:
+                self._remove_outputs(ahj_dir)
+            self.merge_dirty = True
+        finally:
+            self.cleaning.discard(ahj_dir)
+
+    async def _merge(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.pool, utils.merge_clean_files, self.clean_dir, self.merged_path)
+        finally:
+            self.merge_queued = False
+
+    def _remove_outputs(self, ahj_dir):
+        # All the raw files of the AHJ were removed: its cleaned files must leave the merge too
+        ahj = os.path.basename(ahj_dir)
+        for ext in ('.csv', '.arrow'):
+            path = os.path.join(self.clean_dir, ahj + ext)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"🗑️  Removed '{path}': {ahj} has no raw files left.")
+
+    def _parsed_path(self, ahj_dir, raw_path):
+        return os.path.join(ahj_dir, PARSED_DIR, os.path.basename(raw_path) + '.pkl')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean AHJ exports as they land in the staging folders.")
+    parser.add_argument('staging_root', help="Folder with one folder per AHJ, each with a raw/ subfolder.")
+    parser.add_argument('--clean-dir', help="Folder for the cleaned AHJ files (default: <staging_root>/clean).")
+    parser.add_argument('--merged', help="Merged dataset path (default: <staging_root>/Clean_merged.csv).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--poll', type=float, default=5.0, help="Seconds between scans.")
+    parser.add_argument('--settle', type=float, default=10.0, help="Seconds a file must stay unchanged before parsing.")
+    parser.add_argument('--once', action='store_true', help="Process what is staged and exit.")
+    args = parser.parse_args()
+
+    clean_dir = args.clean_dir or os.path.join(args.staging_root, 'clean')
+    merged_path = args.merged or os.path.join(args.staging_root, 'Clean_merged.csv')
+    watcher = StagingWatcher(args.staging_root, clean_dir, merged_path,
+                             workers=args.workers, poll_interval=args.poll, settle_seconds=args.settle)
+    try:
+        asyncio.run(watcher.run(once=args.once))
+    except KeyboardInterrupt:
+        print("👋 Stopped watching.")
+
+
+if __name__ == '__main__':
+    main()